@@ -1,21 +1,25 @@
 """Bot de Telegram — Asistente de Agenda con Google Calendar.
 
-Entry point principal. Registra handlers y arranca polling.
+Entry point principal. Registra handlers y arranca polling (o webhook).
 """
 
+import asyncio
 import logging
 import sys
+from zoneinfo import ZoneInfo
 
+from telegram import LinkPreviewOptions, Update
 from telegram.ext import (
+    AIORateLimiter,
     ApplicationBuilder,
     CommandHandler,
     MessageHandler,
     filters,
     Defaults,
 )
-import pytz
 
 import config
+from google_auth import get_calendar_service
 from handlers.start import start_command
 from handlers.create_event import get_create_event_handler
 from handlers.list_events import agenda_command, hoy_command
@@ -34,18 +38,23 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def check_authorized(func):
-    """Decorator para verificar que el usuario esté autorizado."""
-    async def wrapper(update, context):
-        if config.AUTHORIZED_USER_ID:
-            user_id = str(update.effective_user.id)
-            if user_id != config.AUTHORIZED_USER_ID:
-                await update.message.reply_text(
-                    "⛔ No estás autorizado para usar este bot."
-                )
-                return
-        return await func(update, context)
-    return wrapper
+def get_auth_filter():
+    """Filtro que deja pasar solo al usuario autorizado (si está configurado).
+
+    Al filtrar en el ruteo de PTB, los updates de otros usuarios se descartan
+    sin llegar a ejecutar ningún handler.
+    """
+    if config.AUTHORIZED_USER_ID:
+        return filters.User(user_id=config.AUTHORIZED_CHAT_ID)
+    return filters.ALL
+
+
+async def warm_up(app):
+    """Carga credenciales y el cliente de Calendar antes del primer mensaje."""
+    try:
+        await asyncio.to_thread(get_calendar_service)
+    except Exception as e:
+        logger.warning(f"No se pudo precalentar Google Calendar: {e}")
 
 
 def main():
@@ -61,45 +70,72 @@ def main():
 
     logger.info("🚀 Iniciando bot de agenda...")
 
-    # Configurar zona horaria por defecto para la JobQueue
-    defaults = Defaults(tzinfo=pytz.timezone(config.TIMEZONE))
+    # Configurar zona horaria por defecto para la JobQueue. Sin vista previa de
+    # enlaces: los links a Calendar/Maps no la necesitan y Telegram demora la
+    # respuesta mientras la genera.
+    defaults = Defaults(
+        tzinfo=ZoneInfo(config.TIMEZONE),
+        link_preview_options=LinkPreviewOptions(is_disabled=True),
+    )
 
     # Crear aplicación
-    app = ApplicationBuilder().token(config.TELEGRAM_BOT_TOKEN).defaults(defaults).build()
+    # El rate limiter respeta los límites de Telegram (30 msg/s) y reintenta
+    # tras un RetryAfter en vez de fallar el envío.
+    app = (
+        ApplicationBuilder()
+        .token(config.TELEGRAM_BOT_TOKEN)
+        .defaults(defaults)
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3))
+        # PTB ya usa un pool de 256 conexiones para el bot; lo que se ajusta
+        # son los timeouts, para que un pico de respuestas concurrentes espere
+        # un hueco en el pool en vez de fallar al segundo (default 1s).
+        .connect_timeout(10)
+        .read_timeout(20)
+        .pool_timeout(20)
+        .post_init(warm_up)
+        .build()
+    )
 
     # === Registrar handlers ===
+    # Los handlers que hablan con Google/Gemini corren con block=False: cada
+    # update es su propia tarea y una llamada lenta no frena a las demás.
+    # La conversación de /nuevo sigue bloqueante para que sus pasos no se
+    # procesen en paralelo (el estado avanza al terminar cada callback).
+    auth = get_auth_filter()
 
     # Conversación para crear evento paso a paso (tiene prioridad)
     app.add_handler(get_create_event_handler())
 
     # Comandos simples
     app.add_handler(CommandHandler("start", start_command))
-    app.add_handler(CommandHandler("agenda", check_authorized(agenda_command)))
-    app.add_handler(CommandHandler("hoy", check_authorized(hoy_command)))
-    app.add_handler(CommandHandler("eliminar", check_authorized(eliminar_command)))
-    app.add_handler(CommandHandler("completar", check_authorized(completar_command)))
+    app.add_handler(CommandHandler("agenda", agenda_command, filters=auth, block=False))
+    app.add_handler(CommandHandler("hoy", hoy_command, filters=auth, block=False))
+    app.add_handler(CommandHandler("eliminar", eliminar_command, filters=auth, block=False))
+    app.add_handler(CommandHandler("completar", completar_command, filters=auth, block=False))
 
     # Callbacks de botones inline
     app.add_handler(get_delete_callback_handler())
     app.add_handler(get_completar_callback_handler())
     app.add_handler(get_nlp_callback_handler())
     from handlers.supplements import debug_suplementos_command
-    app.add_handler(CommandHandler("debug_suplementos", check_authorized(debug_suplementos_command)))
+    app.add_handler(CommandHandler("debug_suplementos", debug_suplementos_command, filters=auth, block=False))
     app.add_handler(get_supplement_callback_handler())
 
     # Mensajes de texto libre → NLP (va último, catch-all)
     app.add_handler(
         MessageHandler(
-            filters.TEXT & ~filters.COMMAND,
-            check_authorized(handle_natural_language),
+            filters.TEXT & ~filters.COMMAND & auth,
+            handle_natural_language,
+            block=False,
         )
     )
 
     # Mensajes de voz
     app.add_handler(
         MessageHandler(
-            filters.VOICE,
-            check_authorized(handle_voice),
+            filters.VOICE & auth,
+            handle_voice,
+            block=False,
         )
     )
 
@@ -108,7 +144,30 @@ def main():
 
     # Arrancar
     logger.info("✅ Bot listo. Esperando mensajes...")
-    app.run_polling(drop_pending_updates=True)
+    allowed_updates = [Update.MESSAGE, Update.CALLBACK_QUERY]
+    if config.WEBHOOK_URL:
+        # Webhook: Telegram empuja cada update apenas llega, sin esperar al
+        # ciclo de getUpdates.
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=config.PORT,
+            url_path="telegram",
+            webhook_url=f"{config.WEBHOOK_URL.rstrip('/')}/telegram",
+            secret_token=config.WEBHOOK_SECRET or None,
+            drop_pending_updates=False,
+            allowed_updates=allowed_updates,
+        )
+        return
+
+    # Long polling: Telegram mantiene abierta la petición hasta 50s y responde
+    # apenas llega un update. Solo pedimos los tipos que manejamos.
+    # Telegram guarda el último offset confirmado (PTB lo confirma al apagarse),
+    # así que al reiniciar se retoma desde ahí sin perder los mensajes en cola.
+    app.run_polling(
+        drop_pending_updates=False,
+        timeout=50,
+        allowed_updates=allowed_updates,
+    )
 
 
 if __name__ == "__main__":
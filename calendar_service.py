@@ -2,30 +2,159 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timedelta, time
+import threading
+import urllib.parse
+from datetime import date, datetime, timedelta, time
+from time import monotonic
 from typing import Optional
+from zoneinfo import ZoneInfo
 
-import pytz
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+
+try:
+    # Parser RFC 3339 en C; si no está instalado se usa el de la stdlib
+    from ciso8601 import parse_datetime
+except ImportError:
+    parse_datetime = datetime.fromisoformat
 
 import config
-from google_auth import get_calendar_service
+from google_auth import get_calendar_service, reset_calendar_service
 
 logger = logging.getLogger(__name__)
 
 # Zona horaria configurada
-TZ = pytz.timezone(config.TIMEZONE)
+TZ = ZoneInfo(config.TIMEZONE)
+
+# Segundos que se reutiliza una lectura antes de volver a pedirla a Google
+CACHE_TTL_SECONDS = 60
+
+# Máximo de peticiones por batch que acepta la API de Calendar
+BATCH_LIMIT = 50
+
+# Máximo de peticiones simultáneas a Google, para no agotar la cuota por usuario
+MAX_CONCURRENT_REQUESTS = 5
+_api_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# Ventana compartida (desde hoy 00:00) de la que se filtran /hoy, /agenda y
+# /eliminar: una sola lectura cacheada sirve a los tres comandos
+WINDOW_DAYS = 15
+WINDOW_MAX_RESULTS = 250
+
+# Campos que usa el bot: se piden solo estos (partial response). De start/end
+# solo hace falta la fecha u hora, y de extendedProperties solo lo privado.
+ITEM_FIELDS = (
+    "id,summary,description,location,htmlLink,"
+    "start(date,dateTime),end(date,dateTime),extendedProperties/private"
+)
+EVENT_FIELDS = f"nextPageToken,items({ITEM_FIELDS})"
+
+# Clave privada con el título normalizado para búsquedas (se calcula al listar)
+SEARCH_KEY = "_search_title"
+
+# Quita tildes y diéresis para que "reunion" encuentre "Reunión"
+_ACCENTS = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")
+
+# Largo máximo del texto de un botón inline (Telegram corta los más largos)
+MAX_LABEL_LENGTH = 60
+
+# Marcador histórico de tareas completadas en la descripción
+COMPLETED_MARKER = "[COMPLETADA]"
+
+# Bloque de metadatos que se antepone a la descripción
+METADATA_TAG = "--- METADATA ---"
+
+# Mapeo de Prioridades a Emojis y Colores de Google Calendar
+# Colores Google: 11 (Rojo), 5 (Amarillo), 2 (Verde)
+PRIORITY_STYLES = {
+    "alta": {"emoji": "🔴", "color": "11"},
+    "media": {"emoji": "🟡", "color": "5"},
+    "baja": {"emoji": "🟢", "color": "2"},
+}
+_PRIO_LABELS = {"alta": "🔴 Alta", "media": "🟡 Media", "baja": "🟢 Baja"}
+
+
+class _TTLCache:
+    """Cache en memoria con expiración por entrada (thread-safe)."""
+
+    def __init__(self, ttl: float, maxsize: int = 64):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (monotonic() + self.ttl, value)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        """Descarta las entradas vencidas; si no hay, la más antigua."""
+        now = monotonic()
+        expired = [k for k, (expires, _) in self._data.items() if expires < now]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+# Compartidas por todas las instancias: rangos listados y eventos por ID
+_list_cache = _TTLCache(CACHE_TTL_SECONDS)
+_event_cache = _TTLCache(CACHE_TTL_SECONDS, maxsize=512)
 
 
 class CalendarService:
     """Servicio para gestionar eventos en Google Calendar."""
 
     def __init__(self):
-        self.service = get_calendar_service()
         self.calendar_id = "primary"
 
-    def _refresh_service(self):
-        """Refresca el servicio en caso de token expirado."""
-        self.service = get_calendar_service()
+    @property
+    def service(self):
+        """Servicio de la API para el hilo actual (cacheado en google_auth)."""
+        return get_calendar_service()
+
+    def _refresh_service(self, error: Optional[Exception] = None):
+        """Refresca el servicio solo si el error es de credenciales.
+
+        Los errores de red o de la API no invalidan el servicio cacheado;
+        un token expirado/revocado (RefreshError o HTTP 401) sí.
+        """
+        if isinstance(error, RefreshError) or (
+            isinstance(error, HttpError) and error.resp.status == 401
+        ):
+            reset_calendar_service()
+
+    def _execute(self, request):
+        """Ejecuta una petición respetando el límite de concurrencia."""
+        with _api_slots:
+            return request.execute()
+
+    def _invalidate(self, event_id: Optional[str] = None):
+        """Invalida la cache tras una escritura."""
+        _list_cache.clear()
+        if event_id:
+            _event_cache.pop(event_id)
 
     def list_events(
         self,
@@ -33,50 +162,135 @@ class CalendarService:
         time_max: datetime,
         max_results: int = 50,
     ) -> list[dict]:
-        """Lista eventos entre dos fechas."""
+        """Lista eventos entre dos fechas (hasta `max_results`, paginando).
+
+        El resultado se cachea unos segundos por rango (redondeado al minuto)
+        para que comandos y recordatorios cercanos compartan la misma lectura.
+        """
+        key = (
+            self.calendar_id,
+            time_min.replace(second=0, microsecond=0).isoformat(),
+            time_max.replace(second=0, microsecond=0).isoformat(),
+            max_results,
+        )
+        cached = _list_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        items = []
+        page_token = None
         try:
-            result = (
-                self.service.events()
-                .list(
-                    calendarId=self.calendar_id,
-                    timeMin=time_min.isoformat(),
-                    timeMax=time_max.isoformat(),
-                    maxResults=max_results,
-                    singleEvents=True,
-                    orderBy="startTime",
+            # Google puede devolver páginas incompletas aunque haya más eventos:
+            # seguir nextPageToken hasta llegar a max_results o al final.
+            while True:
+                result = self._execute(
+                    self.service.events().list(
+                        calendarId=self.calendar_id,
+                        timeMin=time_min.isoformat(),
+                        timeMax=time_max.isoformat(),
+                        maxResults=max_results - len(items),
+                        singleEvents=True,
+                        orderBy="startTime",
+                        pageToken=page_token,
+                        fields=EVENT_FIELDS,
+                    )
                 )
-                .execute()
-            )
-            return result.get("items", [])
+                items.extend(result.get("items", []))
+                page_token = result.get("nextPageToken")
+                if not page_token or len(items) >= max_results:
+                    break
         except Exception as e:
             logger.error(f"Error listando eventos: {e}")
-            self._refresh_service()
+            self._refresh_service(e)
+            raise
+
+        for item in items:
+            item[SEARCH_KEY] = fold_text(item.get("summary") or "")
+            _event_cache.set(item["id"], item)
+        _list_cache.set(key, items)
+        return list(items)
+
+    def get_event(self, event_id: str) -> dict:
+        """Devuelve un evento por su ID (desde la cache si se listó hace poco)."""
+        cached = _event_cache.get(event_id)
+        if cached is not None:
+            return cached
+
+        try:
+            event = self._execute(
+                self.service.events().get(
+                    calendarId=self.calendar_id, eventId=event_id, fields=ITEM_FIELDS
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error obteniendo evento: {e}")
+            self._refresh_service(e)
             raise
 
+        _event_cache.set(event_id, event)
+        return event
+
+    def _get_window(self, days: int = WINDOW_DAYS) -> list[dict]:
+        """Eventos desde hoy 00:00 hasta `days` días después.
+
+        El rango solo cambia al cambiar el día, así que la clave de caché es
+        estable y las consultas seguidas reutilizan la misma lectura.
+        """
+        start = datetime.combine(datetime.now(TZ).date(), time.min, tzinfo=TZ)
+        return self.list_events(
+            start, start + timedelta(days=days), max_results=WINDOW_MAX_RESULTS
+        )
+
     def get_today_events(self) -> list[dict]:
         """Devuelve los eventos de hoy."""
         now = datetime.now(TZ)
-        start_of_day = TZ.localize(datetime.combine(now.date(), time.min))
-        end_of_day = TZ.localize(datetime.combine(now.date(), time.max))
-        return self.list_events(start_of_day, end_of_day)
+        start_of_day = datetime.combine(now.date(), time.min, tzinfo=TZ)
+        end_of_day = start_of_day + timedelta(days=1)
+        return [e for e in self._get_window() if _overlaps(e, start_of_day, end_of_day)]
+
+    def get_events_on(self, day: date) -> list[dict]:
+        """Devuelve los eventos de un día concreto.
+
+        Si el día cae dentro de la ventana compartida se filtra de ella (sin
+        otra lectura); si no, se piden solo los eventos de ese día.
+        """
+        start = datetime.combine(day, time.min, tzinfo=TZ)
+        end = start + timedelta(days=1)
+        offset = (day - datetime.now(TZ).date()).days
+        if 0 <= offset < WINDOW_DAYS:
+            return [e for e in self._get_window() if _overlaps(e, start, end)]
+        return self.list_events(start, end)
+
+    def get_pending_today_events(self) -> list[dict]:
+        """Devuelve los eventos de hoy que todavía no están completados."""
+        return [e for e in self.get_today_events() if not is_completed(e)]
 
     def get_upcoming_events(self, days: int = 7) -> list[dict]:
         """Devuelve los eventos futuros de los próximos N días (desde ahora)."""
         now = datetime.now(TZ)
         end = now + timedelta(days=days)
-        return self.list_events(now, end)
+        # Rangos más largos que la ventana compartida usan su propia ventana,
+        # también alineada al día para que las consultas seguidas la reutilicen
+        window = self._get_window(max(WINDOW_DAYS, days + 1))
+        return [e for e in window if _overlaps(e, now, end)]
 
     def check_conflicts(self, start_dt: datetime, end_dt: datetime) -> list[dict]:
-        """Busca eventos que se solapen con el rango dado."""
+        """Busca eventos con hora que se solapen con el rango dado.
+
+        Los de todo el día (tareas, renovaciones 📌) no cuentan como conflicto.
+        Si el rango cae en un solo día se filtra de los eventos de ese día,
+        que suelen estar ya en la ventana compartida.
+        """
         try:
-            events = self.list_events(start_dt, end_dt)
+            if start_dt.date() == end_dt.date():
+                events = [
+                    e for e in self.get_events_on(start_dt.date())
+                    if _overlaps(e, start_dt, end_dt)
+                ]
+            else:
+                events = self.list_events(start_dt, end_dt)
             # Filtrar eventos que no sean de todo el día para mayor precisión en conflictos de hora
-            conflicts = []
-            for e in events:
-                start = e.get("start", {})
-                if "dateTime" in start:
-                    conflicts.append(e)
-            return conflicts
+            return [e for e in events if "dateTime" in e.get("start", {})]
         except Exception as e:
             logger.error(f"Error comprobando conflictos: {e}")
             return []
@@ -93,6 +307,35 @@ class CalendarService:
     ) -> dict:
         """Crea un evento en Google Calendar.
 
+        Recibe los mismos argumentos que `insert_request`.
+        """
+        request = self.insert_request(
+            summary, start_dt, end_dt, description, all_day, location, metadata
+        )
+        try:
+            event = self._execute(request)
+            logger.info(f"Evento creado: {event.get('htmlLink')}")
+            self._invalidate()
+            return event
+        except Exception as e:
+            logger.error(f"Error creando evento: {e}")
+            self._refresh_service(e)
+            raise
+
+    def insert_request(
+        self,
+        summary: str,
+        start_dt: datetime,
+        end_dt: Optional[datetime] = None,
+        description: str = "",
+        all_day: bool = False,
+        location: str = "",
+        metadata: Optional[dict] = None,
+    ):
+        """Arma (sin ejecutar) la petición de inserción de un evento.
+
+        Sirve para `create_event` o para agruparla en `batch_execute`.
+
         Args:
             summary: Título del evento.
             start_dt: Fecha/hora de inicio (con timezone).
@@ -105,21 +348,13 @@ class CalendarService:
         if not end_dt:
             end_dt = start_dt + timedelta(hours=1)
 
-        # Mapeo de Prioridades a Emojis y Colores de Google Calendar
-        # Colores Google: 11 (Rojo), 5 (Amarillo), 2 (Verde)
-        prio_map = {
-            "alta": {"emoji": "🔴", "color": "11"},
-            "media": {"emoji": "🟡", "color": "5"},
-            "baja": {"emoji": "🟢", "color": "2"},
-        }
-        
         current_prio = "media"
         enriched_summary = summary
         color_id = "5"
 
         if metadata:
             current_prio = metadata.get("prioridad", "media").lower()
-            prio_data = prio_map.get(current_prio, prio_map["media"])
+            prio_data = PRIORITY_STYLES.get(current_prio, PRIORITY_STYLES["media"])
             enriched_summary = f"{prio_data['emoji']} {summary}"
             color_id = prio_data["color"]
 
@@ -127,7 +362,7 @@ class CalendarService:
         enriched_desc = description
         if metadata:
             cat = metadata.get("categoria", "personal").upper()
-            meta_line = f"--- METADATA ---\nPRIORIDAD: {current_prio.upper()}\nCATEGORIA: {cat}\n"
+            meta_line = f"{METADATA_TAG}\nPRIORIDAD: {current_prio.upper()}\nCATEGORIA: {cat}\n"
             enriched_desc = f"{meta_line}\n{description}".strip()
 
         if all_day:
@@ -164,106 +399,272 @@ class CalendarService:
                 "reminders": {"useDefault": False, "overrides": []},
             }
 
-        try:
-            logger.info(f"Enviando a Google API: {event_body}")
-            event = (
-                self.service.events()
-                .insert(
-                    calendarId=self.calendar_id,
-                    body=event_body,
-                    sendUpdates="none",
-                )
-                .execute()
-            )
-            logger.info(f"Evento creado: {event.get('htmlLink')}")
-            return event
-        except Exception as e:
-            logger.error(f"Error creando evento: {e}")
-            self._refresh_service()
-            raise
+        event_body["extendedProperties"] = {"private": {"completed": "false"}}
+
+        logger.info(f"Enviando a Google API: {event_body}")
+        return self.service.events().insert(
+            calendarId=self.calendar_id,
+            body=event_body,
+            sendUpdates="none",
+            fields=ITEM_FIELDS,
+        )
 
     def delete_event(self, event_id: str) -> bool:
         """Elimina un evento por su ID."""
         try:
-            self.service.events().delete(
-                calendarId=self.calendar_id, eventId=event_id
-            ).execute()
+            self._execute(self.delete_request(event_id))
             logger.info(f"Evento eliminado: {event_id}")
+            self._invalidate(event_id)
             return True
         except Exception as e:
             logger.error(f"Error eliminando evento: {e}")
-            self._refresh_service()
+            self._refresh_service(e)
             raise
 
     def update_event(self, event_id: str, updates: dict) -> dict:
-        """Actualiza campos de un evento existente."""
+        """Actualiza campos de un evento existente (PATCH, solo lo que cambia)."""
         try:
-            event = (
-                self.service.events()
-                .get(calendarId=self.calendar_id, eventId=event_id)
-                .execute()
-            )
-            event.update(updates)
-            updated = (
-                self.service.events()
-                .update(
-                    calendarId=self.calendar_id,
-                    eventId=event_id,
-                    body=event,
-                    sendUpdates="none",
-                )
-                .execute()
-            )
+            updated = self._execute(self.patch_request(event_id, updates))
             logger.info(f"Evento actualizado: {event_id}")
+            self._invalidate(event_id)
             return updated
         except Exception as e:
             logger.error(f"Error actualizando evento: {e}")
-            self._refresh_service()
+            self._refresh_service(e)
+            raise
+
+    def mark_completed(self, event_id: str, description: str) -> dict:
+        """Marca un evento como completado.
+
+        Args:
+            event_id: ID del evento.
+            description: Descripción actual del evento (ya listada), para no
+                tener que volver a pedirlo.
+        """
+        return self.update_event(event_id, _completed_updates(description))
+
+    def mark_completed_many(self, descriptions: dict[str, str]) -> list:
+        """Marca varios eventos como completados en un solo batch.
+
+        Args:
+            descriptions: {event_id: descripción actual}.
+
+        Returns:
+            Resultado por evento (respuesta o excepción), en el mismo orden.
+        """
+        return self.batch_execute([
+            self.patch_request(event_id, _completed_updates(desc))
+            for event_id, desc in descriptions.items()
+        ])
+
+    def create_events(self, events: list[dict]) -> list:
+        """Crea varios eventos en un solo batch (resultado por evento).
+
+        Args:
+            events: Argumentos de `insert_request` de cada evento.
+        """
+        return self.batch_execute([self.insert_request(**kwargs) for kwargs in events])
+
+    def patch_events(self, updates: dict[str, dict]) -> list:
+        """Aplica varios PATCH en un solo batch (resultado por evento).
+
+        Args:
+            updates: {event_id: campos a modificar}.
+        """
+        return self.batch_execute([
+            self.patch_request(event_id, fields) for event_id, fields in updates.items()
+        ])
+
+    def delete_events(self, event_ids: list[str]) -> list:
+        """Elimina varios eventos en un solo batch (resultado por evento)."""
+        return self.batch_execute([self.delete_request(i) for i in event_ids])
+
+    def delete_request(self, event_id: str):
+        """Arma (sin ejecutar) el DELETE de un evento."""
+        return self.service.events().delete(
+            calendarId=self.calendar_id, eventId=event_id
+        )
+
+    def patch_request(self, event_id: str, updates: dict):
+        """Arma (sin ejecutar) un PATCH con solo los campos modificados."""
+        return self.service.events().patch(
+            calendarId=self.calendar_id,
+            eventId=event_id,
+            body=updates,
+            sendUpdates="none",
+            fields=ITEM_FIELDS,
+        )
+
+    def batch_execute(self, requests: list) -> list:
+        """Ejecuta varias peticiones en un único request HTTP (batch).
+
+        Args:
+            requests: Peticiones sin ejecutar (ej: de `insert_request`).
+
+        Returns:
+            La respuesta de cada petición en el mismo orden, o la excepción
+            si esa petición en particular falló.
+        """
+        results = [None] * len(requests)
+
+        def callback(request_id, response, exception):
+            results[int(request_id)] = exception if exception else response
+
+        try:
+            for offset in range(0, len(requests), BATCH_LIMIT):
+                batch = self.service.new_batch_http_request(callback=callback)
+                chunk = requests[offset:offset + BATCH_LIMIT]
+                for i, request in enumerate(chunk, start=offset):
+                    batch.add(request, request_id=str(i))
+                self._execute(batch)
+        except Exception as e:
+            logger.error(f"Error ejecutando batch: {e}")
+            self._refresh_service(e)
             raise
+        finally:
+            _list_cache.clear()
+            _event_cache.clear()
+
+        return results
+
+
+def _completed_updates(description: str) -> dict:
+    """Campos a modificar para marcar un evento como completado."""
+    return {
+        "description": f"{COMPLETED_MARKER} ✅\n{description}".strip(),
+        "extendedProperties": {"private": {"completed": "true"}},
+    }
+
+
+def _event_bounds(event: dict) -> tuple[datetime, datetime]:
+    """Inicio y fin de un evento como datetimes con zona (día completo = 00:00)."""
+    bounds = []
+    for key in ("start", "end"):
+        value = event[key]
+        if "dateTime" in value:
+            bounds.append(parse_datetime(value["dateTime"]))
+        else:
+            day = datetime.fromisoformat(value["date"]).date()
+            bounds.append(datetime.combine(day, time.min, tzinfo=TZ))
+    return bounds[0], bounds[1]
+
+
+def _overlaps(event: dict, time_min: datetime, time_max: datetime) -> bool:
+    """Mismo criterio que timeMin/timeMax de la API: el evento toca el rango."""
+    start, end = _event_bounds(event)
+    return start < time_max and end > time_min
+
+
+def is_completed(event: dict) -> bool:
+    """Indica si un evento fue marcado como completado.
+
+    Usa la propiedad privada `completed`; los eventos creados antes de
+    existir (o desde fuera del bot) se reconocen por el marcador, que
+    `mark_completed` siempre escribe al principio de la descripción.
+    """
+    private = event.get("extendedProperties", {}).get("private", {})
+    if private.get("completed") == "true":
+        return True
+    return (event.get("description") or "").startswith(COMPLETED_MARKER)
+
+
+# Instancia compartida entre handlers (se inicializa al primer uso)
+_shared_calendar = None
 
 
-def format_event(event: dict, show_past_marker: bool = True) -> str:
-    """Formatea un evento para mostrarlo en Telegram."""
+def get_shared_calendar_service() -> CalendarService:
+    """Devuelve la instancia compartida de CalendarService (lazy init)."""
+    global _shared_calendar
+    if _shared_calendar is None:
+        _shared_calendar = CalendarService()
+    return _shared_calendar
+
+
+def fold_text(text: str) -> str:
+    """Normaliza un texto para comparar títulos (casefold + sin tildes)."""
+    return text.casefold().translate(_ACCENTS)
+
+
+def search_title(event: dict) -> str:
+    """Título normalizado del evento (precalculado si vino de un listado)."""
+    folded = event.get(SEARCH_KEY)
+    if folded is None:
+        folded = fold_text(event.get("summary") or "")
+    return folded
+
+
+def truncate_label(label: str, limit: int = MAX_LABEL_LENGTH) -> str:
+    """Recorta el texto de un botón a `limit` caracteres (con "…" al final)."""
+    return label if len(label) <= limit else f"{label[:limit - 1]}…"
+
+
+def format_event_label(event: dict) -> str:
+    """Texto corto "título (DD/MM HH:MM)" para botones y listas compactas."""
+    summary = event.get("summary", "Sin título")
+    start = event.get("start", {})
+    if "dateTime" in start:
+        dt = parse_datetime(start["dateTime"])
+        if dt.utcoffset() != TZ.utcoffset(dt):
+            dt = dt.astimezone(TZ)
+        date_str = f"{dt.day:02d}/{dt.month:02d} {dt.hour:02d}:{dt.minute:02d}"
+    elif "date" in start:
+        date_str = start["date"]
+    else:
+        date_str = "?"
+    return f"{summary} ({date_str})"
+
+
+def format_event(
+    event: dict,
+    show_past_marker: bool = True,
+    now: Optional[datetime] = None,
+) -> str:
+    """Formatea un evento para mostrarlo en Telegram.
+
+    Args:
+        event: Evento tal como lo devuelve la API.
+        show_past_marker: Si es True, marca los eventos que ya pasaron.
+        now: Hora de referencia; al formatear una lista conviene calcularla
+            una sola vez y pasarla a cada evento.
+    """
     summary = event.get("summary", "Sin título")
     description = event.get("description", "")
     location = event.get("location", "")
-    now = datetime.now(TZ)
+    if now is None:
+        now = datetime.now(TZ)
     is_past = False
 
     # Extraer metadatos de la descripción si existen
     prio_label = ""
     cat_label = ""
     clean_desc = description
-    if "--- METADATA ---" in description:
-        lines = description.split("\n")
-        for line in lines:
-            if "PRIORIDAD:" in line:
-                prio = line.split("PRIORIDAD:")[1].strip().lower()
-                prio_map = {"alta": "🔴 Alta", "media": "🟡 Media", "baja": "🟢 Baja"}
-                prio_label = prio_map.get(prio, "")
-            elif "CATEGORIA:" in line:
-                cat = line.split("CATEGORIA:")[1].strip().lower()
-                cat_label = f"#{cat}"
+    _, tag, after = description.partition(METADATA_TAG)
+    if tag:
+        # Formato: "\nPRIORIDAD: X\nCATEGORIA: Y\n<descripción real>"
+        parts = after.split("\n", 3)
+        for line in parts[1:3]:
+            if line.startswith("PRIORIDAD:"):
+                prio_label = _PRIO_LABELS.get(line[10:].strip().lower(), "")
+            elif line.startswith("CATEGORIA:"):
+                cat_label = f"#{line[10:].strip().lower()}"
         # Limpiar descripción para mostrar solo el contenido real
-        if "--- METADATA ---" in description:
-            parts = description.split("--- METADATA ---")
-            if len(parts) > 1:
-                # El contenido suele estar después de la metadata o antes si el orden cambia
-                # En nuestro caso lo pusimos después.
-                clean_desc = parts[1].split("\n", 3)[-1].strip()
+        clean_desc = parts[3].strip() if len(parts) > 3 else ""
 
     start = event.get("start", {})
     if "dateTime" in start:
-        dt = datetime.fromisoformat(start["dateTime"])
-        dt_local = dt.astimezone(TZ)
-        date_str = dt_local.strftime("%d/%m/%Y")
-        time_str = dt_local.strftime("%H:%M")
+        dt = parse_datetime(start["dateTime"])
+        # Google suele devolver la hora ya con el offset de la zona local
+        dt_local = dt if dt.utcoffset() == TZ.utcoffset(dt) else dt.astimezone(TZ)
+        date_str = f"{dt_local.day:02d}/{dt_local.month:02d}/{dt_local.year}"
+        time_str = f"{dt_local.hour:02d}:{dt_local.minute:02d}"
         is_past = dt_local < now
         when = f"📅 {date_str}  🕐 {time_str}"
     elif "date" in start:
-        dt = datetime.strptime(start["date"], "%Y-%m-%d")
-        is_past = dt.date() < now.date()
-        when = f"📅 {dt.strftime('%d/%m/%Y')}  (todo el día)"
+        # "YYYY-MM-DD": las fechas ISO se comparan bien como texto
+        date_iso = start["date"]
+        year, month, day = date_iso.split("-")
+        is_past = date_iso < now.date().isoformat()
+        when = f"📅 {day}/{month}/{year}  (todo el día)"
     else:
         when = "📅 Fecha no disponible"
 
@@ -275,7 +676,6 @@ def format_event(event: dict, show_past_marker: bool = True) -> str:
     if cat_label: details.append(f"🏷️ {cat_label}")
     if location:
         # Codificar ubicación para URL de Maps
-        import urllib.parse
         loc_encoded = urllib.parse.quote(location)
         details.append(f"📍 [Ver Mapa](https://www.google.com/maps/search/?api=1&query={loc_encoded})")
     
@@ -18,8 +18,15 @@ GOOGLE_TOKEN_JSON = os.getenv("GOOGLE_TOKEN_JSON", "")           # Para Railway/
 GOOGLE_TOKEN_FILE = "token.json"
 GOOGLE_SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
+# Webhook (opcional): si WEBHOOK_URL está definida se usa webhook en vez de polling
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")        # URL pública, ej: https://mi-bot.up.railway.app
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # Se valida en cada update recibido
+PORT = int(os.getenv("PORT", "8443"))
+
 # Seguridad
 AUTHORIZED_USER_ID = os.getenv("AUTHORIZED_USER_ID", "")
+# Como entero: en el chat privado con el bot, el chat_id es el ID del usuario
+AUTHORIZED_CHAT_ID = int(AUTHORIZED_USER_ID) if AUTHORIZED_USER_ID else None
 
 # Zona horaria
 TIMEZONE = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
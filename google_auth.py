@@ -1,13 +1,26 @@
 """Autenticación OAuth 2.0 con Google Calendar."""
 
 import os
+import threading
+
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
 
 import config
 
+# Credenciales compartidas y servicio por hilo (se construyen al primer uso).
+# httplib2 no es thread-safe, así que cada hilo que llama a la API (p. ej. vía
+# asyncio.to_thread) mantiene su propio servicio.
+_credentials = None
+_credentials_lock = threading.Lock()
+_local = threading.local()
+# Se incrementa al resetear para invalidar los servicios de todos los hilos
+_generation = 0
+
 
 def get_credentials() -> Credentials:
     """Obtiene o refresca las credenciales de Google Calendar.
@@ -61,7 +74,36 @@ def get_credentials() -> Credentials:
     return creds
 
 
+def _get_shared_credentials() -> Credentials:
+    """Devuelve las credenciales cacheadas, cargándolas la primera vez."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials = get_credentials()
+        return _credentials
+
+
 def get_calendar_service():
-    """Devuelve un servicio autenticado de Google Calendar API."""
-    creds = get_credentials()
-    return build("calendar", "v3", credentials=creds)
+    """Devuelve un servicio autenticado de Google Calendar API (lazy init).
+
+    El objeto de `build()` y su conexión HTTP (keep-alive) se reutilizan
+    entre llamadas del mismo hilo: las credenciales se refrescan solas, así
+    que solo hay que reconstruirlo si fallan.
+    """
+    if getattr(_local, "generation", None) != _generation:
+        http = AuthorizedHttp(_get_shared_credentials(), http=build_http())
+        # Discovery empaquetado con la librería: sin descarga ni cache en disco
+        _local.service = build(
+            "calendar", "v3", http=http,
+            static_discovery=True, cache_discovery=False,
+        )
+        _local.generation = _generation
+    return _local.service
+
+
+def reset_calendar_service():
+    """Descarta credenciales y servicios cacheados para forzar una nueva autenticación."""
+    global _credentials, _generation
+    with _credentials_lock:
+        _credentials = None
+        _generation += 1
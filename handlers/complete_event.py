@@ -1,28 +1,85 @@
 """Handler para marcar tareas como completadas — /completar."""
 
+import asyncio
+import html
 import logging
+from time import monotonic
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
 from telegram.ext import ContextTypes, CallbackQueryHandler
 
-from calendar_service import CalendarService
-from reminder_scheduler import COMPLETED_MARKER
+from calendar_service import MAX_LABEL_LENGTH, get_shared_calendar_service, truncate_label
+from handlers.delete_event import CONFIRM_WINDOW_SECONDS
 
 logger = logging.getLogger(__name__)
 
 
+_CANCEL_ROW = [InlineKeyboardButton("❌ Cancelar", callback_data="comp_cancelar")]
+_ALL_ROW = [InlineKeyboardButton("✅ Completar todas", callback_data="comp_all")]
+
+# Mensajes con "Completar todas" que conservan su conjunto (los más recientes)
+MAX_COMPLETE_ALL_SETS = 5
+
+
+def _button_label(summary: str) -> str:
+    """Texto del botón para una tarea, truncado si es muy largo."""
+    return truncate_label(f"✅ {summary}")
+
+
+def remember_for_completion(context: ContextTypes.DEFAULT_TYPE, events: list[dict]):
+    """Guarda título y descripción de las tareas ofrecidas en los botones.
+
+    Así `confirmar_completar` puede marcarlas sin volver a pedir el evento.
+    """
+    context.user_data["eventos_completar"] = {
+        e["id"]: {
+            "summary": e.get("summary", "Sin título")[:MAX_LABEL_LENGTH],
+            "description": e.get("description", ""),
+        }
+        for e in events
+    }
+
+
+def remember_for_complete_all(
+    context: ContextTypes.DEFAULT_TYPE, message_id: int, events: list[dict]
+):
+    """Guarda las tareas a las que aplica el "Completar todas" del mensaje.
+
+    Se guardan por mensaje (user_data["comp_all"][message_id]) para que un
+    botón viejo no actúe sobre la lista de otro mensaje.
+    """
+    sets = context.user_data.setdefault("comp_all", {})
+    sets[message_id] = {e["id"]: e.get("summary", "Sin título") for e in events}
+    while len(sets) > MAX_COMPLETE_ALL_SETS:
+        del sets[next(iter(sets))]
+
+
+def completion_keyboard(events: list[dict], allow_all: bool = False) -> InlineKeyboardMarkup:
+    """Un botón por tarea (comp_<id>) más el de cancelar.
+
+    Con `allow_all` agrega "Completar todas", que las marca en un solo batch.
+    """
+    keyboard = [
+        [InlineKeyboardButton(
+            _button_label(e.get("summary") or "Sin título"),
+            callback_data=f"comp_{e['id']}",
+        )]
+        for e in events
+    ]
+    if allow_all and len(events) > 1:
+        keyboard.append(_ALL_ROW)
+    keyboard.append(_CANCEL_ROW)
+    return InlineKeyboardMarkup(keyboard)
+
+
 async def completar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lista los eventos de hoy para marcar como completados."""
     await update.message.reply_text("🔍 Cargando tareas de hoy...")
 
     try:
-        cal = CalendarService()
-        events = cal.get_today_events()
-
-        # Filtrar solo pendientes (no completadas)
-        pending = [
-            e for e in events
-            if COMPLETED_MARKER not in e.get("description", "")
-        ]
+        cal = get_shared_calendar_service()
+        pending = await asyncio.to_thread(cal.get_pending_today_events)
 
         if not pending:
             await update.message.reply_text(
@@ -30,29 +87,13 @@ async def completar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
 
-        context.user_data["eventos_completar"] = {
-            e["id"]: e.get("summary", "Sin título") for e in pending
-        }
-
-        keyboard = []
-        for event in pending:
-            summary = event.get("summary", "Sin título")
-            label = f"✅ {summary}"
-            if len(label) > 60:
-                label = label[:57] + "..."
-            keyboard.append([
-                InlineKeyboardButton(label, callback_data=f"comp_{event['id']}")
-            ])
-
-        keyboard.append([
-            InlineKeyboardButton("❌ Cancelar", callback_data="comp_cancelar")
-        ])
+        remember_for_completion(context, pending)
 
         await update.message.reply_text(
-            f"📋 *Tareas pendientes hoy* ({len(pending)}):\n\n"
+            f"📋 <b>Tareas pendientes hoy</b> ({len(pending)}):\n\n"
             "¿Cuál completaste?",
-            parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode=ParseMode.HTML,
+            reply_markup=completion_keyboard(pending),
         )
     except Exception as e:
         logger.error(f"Error listando tareas para completar: {e}")
@@ -62,6 +103,11 @@ async def completar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def confirmar_completar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Callback para marcar tarea como completada."""
     query = update.callback_query
+
+    if query.data == "comp_all":
+        await _confirm_complete_all(query, context)
+        return
+
     await query.answer()
 
     if query.data == "comp_cancelar":
@@ -70,23 +116,21 @@ async def confirmar_completar(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     if query.data.startswith("comp_"):
         event_id = query.data.replace("comp_", "")
-        event_name = context.user_data.get("eventos_completar", {}).get(
-            event_id, "tarea"
-        )
+        cached = context.user_data.get("eventos_completar", {}).get(event_id)
 
         try:
-            cal = CalendarService()
+            cal = get_shared_calendar_service()
 
-            # Obtener evento actual y agregar marcador de completada
-            service = cal.service
-            event = service.events().get(
-                calendarId=cal.calendar_id, eventId=event_id
-            ).execute()
+            if cached:
+                event_name = cached["summary"]
+                current_desc = cached["description"]
+            else:
+                # Botón de un mensaje viejo: pedir el evento (o usar la cache)
+                event = await asyncio.to_thread(cal.get_event, event_id)
+                event_name = event.get("summary", "tarea")
+                current_desc = event.get("description", "")
 
-            current_desc = event.get("description", "")
-            new_desc = f"{COMPLETED_MARKER} ✅\n{current_desc}".strip()
-
-            cal.update_event(event_id, {"description": new_desc})
+            await asyncio.to_thread(cal.mark_completed, event_id, current_desc)
 
             # Preguntar si quiere eliminarla
             keyboard = [
@@ -100,9 +144,9 @@ async def confirmar_completar(update: Update, context: ContextTypes.DEFAULT_TYPE
             ]
 
             await query.edit_message_text(
-                f"✅ *{event_name}* marcada como completada!\n\n"
+                f"✅ <b>{html.escape(event_name)}</b> marcada como completada!\n\n"
                 "¿Quieres eliminarla del calendario o mantenerla?",
-                parse_mode="Markdown",
+                parse_mode=ParseMode.HTML,
                 reply_markup=InlineKeyboardMarkup(keyboard),
             )
         except Exception as e:
@@ -110,6 +154,71 @@ async def confirmar_completar(update: Update, context: ContextTypes.DEFAULT_TYPE
             await query.edit_message_text(f"❌ Error: {e}")
 
 
+async def _confirm_complete_all(query, context: ContextTypes.DEFAULT_TYPE):
+    """Botón "Completar todas": el primer toque avisa y el segundo confirma.
+
+    Igual que "Borrar todos": solo vale para las tareas de este mensaje, y el
+    segundo toque debe llegar dentro de CONFIRM_WINDOW_SECONDS.
+    """
+    message_id = query.message.message_id
+    targets = context.user_data.get("comp_all", {}).get(message_id)
+    if not targets:
+        await query.answer(
+            "⚠️ Esta lista ya no está vigente. Pide las tareas de nuevo.",
+            show_alert=True,
+        )
+        return
+
+    now = monotonic()
+    pending = context.user_data.get("comp_all_pending")
+    if pending and pending[0] == message_id and now - pending[1] < CONFIRM_WINDOW_SECONDS:
+        context.user_data.pop("comp_all_pending", None)
+        await query.answer()
+        await _complete_all(query, context, targets)
+        return
+
+    context.user_data["comp_all_pending"] = (message_id, now)
+    await query.answer(
+        f"⚠️ ¿Completar las {len(targets)} tareas? Pulsa de nuevo el botón para confirmar.",
+        show_alert=True,
+    )
+
+
+async def _complete_all(query, context: ContextTypes.DEFAULT_TYPE, targets: dict[str, str]):
+    """Marca como completadas, en un único batch, las tareas de este mensaje.
+
+    Las descripciones se toman del listado actual de pendientes de hoy (no
+    de lo guardado al mostrar el mensaje), así no se pisa una edición
+    posterior; las que ya se completaron mientras tanto se omiten.
+    """
+    try:
+        cal = get_shared_calendar_service()
+        pending = await asyncio.to_thread(cal.get_pending_today_events)
+        descriptions = {
+            e["id"]: e.get("description", "") for e in pending if e["id"] in targets
+        }
+        if not descriptions:
+            context.user_data.get("comp_all", {}).pop(query.message.message_id, None)
+            await query.edit_message_text("✅ Esas tareas ya estaban completadas.")
+            return
+        results = await asyncio.to_thread(cal.mark_completed_many, descriptions)
+    except Exception as e:
+        logger.error(f"Error completando tareas: {e}")
+        await query.edit_message_text(f"❌ Error: {e}")
+        return
+
+    failed = [
+        targets[event_id]
+        for event_id, result in zip(descriptions, results)
+        if isinstance(result, Exception)
+    ]
+    text = f"✅ {len(descriptions) - len(failed)} tarea(s) marcada(s) como completada(s)! 🎉"
+    if failed:
+        text += "\n⚠️ No se pudieron marcar: " + ", ".join(failed)
+    context.user_data.get("comp_all", {}).pop(query.message.message_id, None)
+    await query.edit_message_text(text)
+
+
 def get_completar_callback_handler() -> CallbackQueryHandler:
     """Devuelve el handler para callbacks de completar."""
-    return CallbackQueryHandler(confirmar_completar, pattern=r"^comp_")
+    return CallbackQueryHandler(confirmar_completar, pattern=r"^comp_", block=False)
@@ -1,9 +1,12 @@
 """Handler para crear eventos — flujo conversacional con /nuevo."""
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
 
-import pytz
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     ContextTypes,
@@ -14,18 +17,56 @@ from telegram.ext import (
     filters,
 )
 
-import config
-from calendar_service import CalendarService, format_event
+from calendar_service import TZ, format_event, get_shared_calendar_service
 
 logger = logging.getLogger(__name__)
-TZ = pytz.timezone(config.TIMEZONE)
 
 # Estados de la conversación
 TITULO, FECHA, HORA, CONFIRMAR = range(4)
 
 
+@dataclass(slots=True)
+class NuevoEventoState:
+    """Datos del evento que se va armando en /nuevo (en user_data["nuevo"])."""
+
+    titulo: str = ""
+    fecha: Optional[date] = None
+    start: Optional[datetime] = None
+    all_day: bool = False
+
+
+# Días de la semana aceptados en la fecha (con y sin tilde)
+_DIAS = {
+    "lunes": 0, "martes": 1, "miércoles": 2, "miercoles": 2,
+    "jueves": 3, "viernes": 4, "sábado": 5, "sabado": 5, "domingo": 6,
+}
+
+# (día de hoy, nombre) → días hasta la próxima ocurrencia. Nombrar el día de
+# hoy significa el de la semana que viene (7), no hoy: para hoy está "hoy".
+_WEEKDAY_OFFSETS = {
+    (wd, name): (idx - wd) % 7 or 7
+    for wd in range(7)
+    for name, idx in _DIAS.items()
+}
+
+# DD/MM o DD/MM/AAAA en una sola pasada (sin strptime)
+_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})(?:/(\d{4}))?$")
+
+# Respuestas que equivalen a "sin hora"
+_TODO_EL_DIA = frozenset({"todo el día", "todo el dia", "dia completo", "día completo"})
+
+# Teclado fijo del resumen (se arma una sola vez)
+_CONFIRM_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("✅ Confirmar", callback_data="confirmar_si"),
+        InlineKeyboardButton("❌ Cancelar", callback_data="confirmar_no"),
+    ]
+])
+
+
 async def nuevo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Inicia el flujo de creación de evento paso a paso."""
+    context.user_data["nuevo"] = NuevoEventoState()
     await update.message.reply_text(
         "📝 *Crear nuevo evento*\n\n"
         "¿Cuál es el título del evento?",
@@ -36,7 +77,7 @@ async def nuevo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
 
 async def recibir_titulo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Recibe el título y pide la fecha."""
-    context.user_data["nuevo_titulo"] = update.message.text
+    context.user_data["nuevo"].titulo = update.message.text
     await update.message.reply_text(
         f'✅ Título: *{update.message.text}*\n\n'
         "📅 ¿Qué fecha? (formato: DD/MM/AAAA)\n"
@@ -46,45 +87,45 @@ async def recibir_titulo(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     return FECHA
 
 
+def _parse_fecha(text: str, now: datetime) -> Optional[date]:
+    """Interpreta hoy/mañana, un día de la semana o DD/MM(/AAAA).
+
+    Devuelve None si el texto no es una fecha válida.
+    """
+    if text == "hoy":
+        return now.date()
+    if text == "mañana":
+        return (now + timedelta(days=1)).date()
+
+    offset = _WEEKDAY_OFFSETS.get((now.weekday(), text))
+    if offset is not None:
+        return (now + timedelta(days=offset)).date()
+
+    m = _DATE_RE.match(text)
+    if m is None:
+        return None
+    try:
+        return date(int(m[3] or now.year), int(m[2]), int(m[1]))
+    except ValueError:
+        return None
+
+
 async def recibir_fecha(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Recibe la fecha y pide la hora."""
-    text = update.message.text.strip().lower()
+    text = update.message.text.strip().casefold()
     now = datetime.now(TZ)
 
-    # Interpretar fechas relativas
-    if text == "hoy":
-        fecha = now.date()
-    elif text == "mañana":
-        fecha = (now + timedelta(days=1)).date()
-    else:
-        # Intentar días de la semana
-        dias = {
-            "lunes": 0, "martes": 1, "miércoles": 2, "miercoles": 2,
-            "jueves": 3, "viernes": 4, "sábado": 5, "sabado": 5, "domingo": 6,
-        }
-        if text in dias:
-            target_day = dias[text]
-            days_ahead = target_day - now.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            fecha = (now + timedelta(days=days_ahead)).date()
-        else:
-            # Intentar formato DD/MM/AAAA
-            try:
-                fecha = datetime.strptime(text, "%d/%m/%Y").date()
-            except ValueError:
-                try:
-                    fecha = datetime.strptime(text, "%d/%m").replace(year=now.year).date()
-                except ValueError:
-                    await update.message.reply_text(
-                        "❌ No entendí la fecha. Prueba con:\n"
-                        "• _hoy_, _mañana_, _lunes_, _martes_...\n"
-                        "• _DD/MM/AAAA_ (ej: 20/02/2026)",
-                        parse_mode="Markdown",
-                    )
-                    return FECHA
-
-    context.user_data["nuevo_fecha"] = fecha
+    fecha = _parse_fecha(text, now)
+    if fecha is None:
+        await update.message.reply_text(
+            "❌ No entendí la fecha. Prueba con:\n"
+            "• _hoy_, _mañana_, _lunes_, _martes_...\n"
+            "• _DD/MM/AAAA_ (ej: 20/02/2026)",
+            parse_mode="Markdown",
+        )
+        return FECHA
+
+    context.user_data["nuevo"].fecha = fecha
     await update.message.reply_text(
         f"✅ Fecha: *{fecha.strftime('%d/%m/%Y')}*\n\n"
         "🕐 ¿A qué hora? (formato: HH:MM, ej: 15:30)\n"
@@ -97,41 +138,36 @@ async def recibir_fecha(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
 async def recibir_hora(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Recibe la hora y muestra resumen para confirmar."""
     text = update.message.text.strip().lower()
-    fecha = context.user_data["nuevo_fecha"]
-    titulo = context.user_data["nuevo_titulo"]
+    state = context.user_data["nuevo"]
+    fecha = state.fecha
+    titulo = state.titulo
 
-    if text in ("todo el día", "todo el dia", "dia completo", "día completo"):
-        context.user_data["nuevo_all_day"] = True
-        context.user_data["nuevo_start"] = TZ.localize(
-            datetime.combine(fecha, datetime.min.time())
-        )
+    if text in _TODO_EL_DIA:
+        state.all_day = True
+        state.start = datetime.combine(fecha, time.min, tzinfo=TZ)
         hora_str = "Todo el día"
     else:
         try:
-            hora = datetime.strptime(text, "%H:%M").time()
-        except ValueError:
-            try:
-                hora = datetime.strptime(text, "%H").time()
-            except ValueError:
-                await update.message.reply_text(
-                    "❌ No entendí la hora. Prueba con formato HH:MM (ej: 15:30)"
-                )
-                return HORA
-
-        context.user_data["nuevo_all_day"] = False
-        start_dt = TZ.localize(datetime.combine(fecha, hora))
-        context.user_data["nuevo_start"] = start_dt
+            # HH:MM o HH, sin pasar por strptime
+            parts = text.split(":")
+            if len(parts) > 2:
+                raise ValueError(text)
+            h = int(parts[0])
+            m = int(parts[1]) if len(parts) > 1 else 0
+            if not (0 <= h < 24 and 0 <= m < 60):
+                raise ValueError(text)
+            hora = time(h, m)
+        except (ValueError, IndexError):
+            await update.message.reply_text(
+                "❌ No entendí la hora. Prueba con formato HH:MM (ej: 15:30)"
+            )
+            return HORA
+
+        state.all_day = False
+        state.start = datetime.combine(fecha, hora, tzinfo=TZ)
         hora_str = hora.strftime("%H:%M")
 
     # Mostrar resumen
-    keyboard = [
-        [
-            InlineKeyboardButton("✅ Confirmar", callback_data="confirmar_si"),
-            InlineKeyboardButton("❌ Cancelar", callback_data="confirmar_no"),
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
     await update.message.reply_text(
         "📋 *Resumen del evento:*\n\n"
         f"📌 *Título:* {titulo}\n"
@@ -139,7 +175,7 @@ async def recibir_hora(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         f"🕐 *Hora:* {hora_str}\n\n"
         "¿Confirmar creación?",
         parse_mode="Markdown",
-        reply_markup=reply_markup,
+        reply_markup=_CONFIRM_MARKUP,
     )
     return CONFIRMAR
 
@@ -151,20 +187,20 @@ async def confirmar_evento(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     if query.data == "confirmar_no":
         await query.edit_message_text("❌ Evento cancelado.")
-        context.user_data.clear()
+        context.user_data.pop("nuevo", None)
         return ConversationHandler.END
 
     # Crear el evento
-    titulo = context.user_data["nuevo_titulo"]
-    start_dt = context.user_data["nuevo_start"]
-    all_day = context.user_data["nuevo_all_day"]
+    state = context.user_data["nuevo"]
+    titulo = state.titulo
 
     try:
-        cal = CalendarService()
-        event = cal.create_event(
+        cal = get_shared_calendar_service()
+        event = await asyncio.to_thread(
+            cal.create_event,
             summary=titulo,
-            start_dt=start_dt,
-            all_day=all_day,
+            start_dt=state.start,
+            all_day=state.all_day,
         )
 
         link = event.get("htmlLink", "")
@@ -175,19 +211,19 @@ async def confirmar_evento(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             parse_mode="Markdown",
         )
     except Exception as e:
-        logger.error(f"Error creando evento: {e}")
+        logger.error("Error creando evento: %s", e)
         await query.edit_message_text(
             f"❌ Error al crear el evento: {e}"
         )
 
-    context.user_data.clear()
+    context.user_data.pop("nuevo", None)
     return ConversationHandler.END
 
 
 async def cancelar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancela el flujo de creación."""
     await update.message.reply_text("❌ Creación de evento cancelada.")
-    context.user_data.clear()
+    context.user_data.pop("nuevo", None)
     return ConversationHandler.END
 
 
@@ -1,21 +1,76 @@
 """Handler para eliminar eventos — /eliminar."""
 
+import asyncio
 import logging
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Optional
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
 
-from calendar_service import CalendarService
+from calendar_service import format_event_label, get_shared_calendar_service, truncate_label
 
 logger = logging.getLogger(__name__)
 
+# Máximo de eventos ofrecidos como botones
+MAX_BUTTONS = 15
+
+# Segundos en los que un segundo toque sobre el mismo evento confirma el borrado
+CONFIRM_WINDOW_SECONDS = 10
+
+# callback_data del botón "Borrar todos"; los eventos se guardan por mensaje
+# (user_data["del_all"][message_id]) para que un botón viejo no actúe sobre
+# la lista de otro mensaje
+DELETE_ALL_CALLBACK = "del_all"
+_ALL = DELETE_ALL_CALLBACK.replace("del_", "")
+
+# Mensajes con "Borrar todos" que conservan su conjunto (los más recientes)
+MAX_DELETE_ALL_SETS = 5
+
+# Botón fijo de cancelar (los botones son inmutables, se arma una sola vez)
+_CANCEL_BUTTON = [InlineKeyboardButton("❌ Cancelar", callback_data="del_cancelar")]
+
+
+@dataclass(slots=True)
+class EliminarState:
+    """Eventos ofrecidos en los botones de eliminación (en user_data["eliminar"])."""
+
+    nombres: dict[str, str] = field(default_factory=dict)  # {id: título}
+    pending_id: Optional[str] = None  # evento tocado una vez, esperando confirmación
+    pending_at: float = 0.0
+
+
+def remember_for_deletion(context: ContextTypes.DEFAULT_TYPE, events: list[dict]):
+    """Guarda el título de los eventos ofrecidos para usarlo al confirmar."""
+    context.user_data["eliminar"] = EliminarState(
+        {e["id"]: e.get("summary", "Sin título") for e in events}
+    )
+
+
+def remember_for_delete_all(
+    context: ContextTypes.DEFAULT_TYPE, message_id: int, events: list[dict]
+):
+    """Guarda los eventos a los que aplica el "Borrar todos" del mensaje."""
+    sets = context.user_data.setdefault("del_all", {})
+    sets[message_id] = {e["id"]: e.get("summary", "Sin título") for e in events}
+    while len(sets) > MAX_DELETE_ALL_SETS:
+        del sets[next(iter(sets))]
+
+
+def _event_name(context: ContextTypes.DEFAULT_TYPE, event_id: str, default: str) -> str:
+    """Título guardado de un evento ofrecido, o `default` si no está."""
+    state = context.user_data.get("eliminar")
+    return state.nombres.get(event_id, default) if state else default
+
 
 async def eliminar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lista los próximos eventos con botones para eliminar."""
     await update.message.reply_text("🔍 Cargando eventos...")
 
     try:
-        cal = CalendarService()
-        events = cal.get_upcoming_events(days=14)
+        cal = get_shared_calendar_service()
+        events = await asyncio.to_thread(cal.get_upcoming_events, days=14)
 
         if not events:
             await update.message.reply_text(
@@ -23,99 +78,133 @@ async def eliminar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
 
-        # Guardar eventos en contexto para referencia
-        context.user_data["eventos_para_eliminar"] = {
-            event["id"]: event.get("summary", "Sin título") for event in events
-        }
+        shown = events[:MAX_BUTTONS]
+        # Guardar solo los eventos mostrados (los únicos que se pueden elegir)
+        remember_for_deletion(context, shown)
 
         keyboard = []
-        for event in events[:15]:  # Máximo 15 botones
-            summary = event.get("summary", "Sin título")
-            start = event.get("start", {})
-            if "dateTime" in start:
-                from datetime import datetime
-                dt = datetime.fromisoformat(start["dateTime"])
-                date_str = dt.strftime("%d/%m %H:%M")
-            elif "date" in start:
-                date_str = start["date"]
-            else:
-                date_str = "?"
-
-            label = f"🗑️ {summary} ({date_str})"
-            # Truncar label si es muy largo
-            if len(label) > 60:
-                label = label[:57] + "..."
-
+        for event in shown:
+            label = truncate_label(f"🗑️ {format_event_label(event)}")
             keyboard.append([
                 InlineKeyboardButton(label, callback_data=f"del_{event['id']}")
             ])
 
-        keyboard.append([
-            InlineKeyboardButton("❌ Cancelar", callback_data="del_cancelar")
-        ])
+        keyboard.append(_CANCEL_BUTTON)
 
         await update.message.reply_text(
             "🗑️ *¿Qué evento quieres eliminar?*\n\n"
-            "Selecciona uno de la lista:",
+            "Selecciona uno de la lista (tócalo de nuevo para confirmar):",
             parse_mode="Markdown",
             reply_markup=InlineKeyboardMarkup(keyboard),
         )
     except Exception as e:
-        logger.error(f"Error listando eventos para eliminar: {e}")
+        logger.error("Error listando eventos para eliminar: %s", e)
         await update.message.reply_text(f"❌ Error: {e}")
 
 
 async def confirmar_eliminacion(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Maneja la selección de evento para eliminar."""
+    """Maneja la selección de evento para eliminar.
+
+    El primer toque sobre un evento muestra un aviso (show_alert, viaja en la
+    misma respuesta al callback); tocarlo otra vez dentro de
+    CONFIRM_WINDOW_SECONDS lo elimina. Así la confirmación no cuesta un
+    mensaje editado extra.
+    """
     query = update.callback_query
-    await query.answer()
 
     if query.data == "del_cancelar":
+        await query.answer()
         await query.edit_message_text("❌ Eliminación cancelada.")
         return
 
     if query.data.startswith("del_confirm_"):
-        # Confirmar eliminación
-        event_id = query.data.replace("del_confirm_", "")
-        try:
-            cal = CalendarService()
-            cal.delete_event(event_id)
-
-            event_name = context.user_data.get("eventos_para_eliminar", {}).get(
-                event_id, "evento"
-            )
-            await query.edit_message_text(
-                f"✅ Evento *{event_name}* eliminado exitosamente.",
-                parse_mode="Markdown",
-            )
-        except Exception as e:
-            logger.error(f"Error eliminando evento: {e}")
-            await query.edit_message_text(f"❌ Error al eliminar: {e}")
+        # Botón "Eliminar del calendario" de /completar (y de mensajes viejos)
+        await query.answer()
+        await _delete(query, context, query.data.replace("del_confirm_", ""))
         return
 
-    if query.data.startswith("del_"):
-        # Pedir confirmación
-        event_id = query.data.replace("del_", "")
-        event_name = context.user_data.get("eventos_para_eliminar", {}).get(
-            event_id, "este evento"
-        )
+    event_id = query.data.replace("del_", "")
+    targets = None
+    if event_id == _ALL:
+        targets = context.user_data.get("del_all", {}).get(query.message.message_id)
+        if not targets:
+            await query.answer(
+                "⚠️ Esta lista ya no está vigente. Pide los eventos de nuevo.",
+                show_alert=True,
+            )
+            return
+        # La confirmación vale solo para el botón de este mensaje
+        pending_key = f"{_ALL}:{query.message.message_id}"
+    else:
+        pending_key = event_id
+
+    state = context.user_data.setdefault("eliminar", EliminarState())
+    now = monotonic()
+    if state.pending_id == pending_key and now - state.pending_at < CONFIRM_WINDOW_SECONDS:
+        state.pending_id = None
+        await query.answer()
+        if targets is not None:
+            await _delete_all(query, context, targets)
+        else:
+            await _delete(query, context, event_id)
+        return
 
-        keyboard = [
-            [
-                InlineKeyboardButton(
-                    "✅ Sí, eliminar", callback_data=f"del_confirm_{event_id}"
-                ),
-                InlineKeyboardButton("❌ No", callback_data="del_cancelar"),
-            ]
-        ]
+    state.pending_id = pending_key
+    state.pending_at = now
+    if targets is not None:
+        event_name = f"los {len(targets)} eventos"
+    else:
+        event_name = _event_name(context, event_id, "este evento")
+    # Telegram admite hasta 200 caracteres en el texto de la alerta
+    await query.answer(
+        f"⚠️ ¿Eliminar {event_name[:120]}? Pulsa de nuevo el botón para confirmar.",
+        show_alert=True,
+    )
+
+
+async def _delete(query, context: ContextTypes.DEFAULT_TYPE, event_id: str):
+    """Elimina el evento y edita el mensaje con el resultado."""
+    try:
+        cal = get_shared_calendar_service()
+        await asyncio.to_thread(cal.delete_event, event_id)
 
+        event_name = _event_name(context, event_id, "evento")
         await query.edit_message_text(
-            f"⚠️ ¿Estás seguro de eliminar *{event_name}*?",
+            f"✅ Evento *{event_name}* eliminado exitosamente.",
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup(keyboard),
         )
+    except Exception as e:
+        logger.error("Error eliminando evento: %s", e)
+        await query.edit_message_text(f"❌ Error al eliminar: {e}")
+
+
+async def _delete_all(query, context: ContextTypes.DEFAULT_TYPE, targets: dict[str, str]):
+    """Elimina en un único batch los eventos del "Borrar todos" de este mensaje.
+
+    Args:
+        targets: {id: título} guardado por `remember_for_delete_all`.
+    """
+    event_ids = list(targets)
+    try:
+        cal = get_shared_calendar_service()
+        results = await asyncio.to_thread(cal.delete_events, event_ids)
+    except Exception as e:
+        logger.error("Error eliminando eventos: %s", e)
+        await query.edit_message_text(f"❌ Error al eliminar: {e}")
+        return
+
+    failed = [
+        targets[event_id]
+        for event_id, result in zip(event_ids, results)
+        if isinstance(result, Exception)
+    ]
+    text = f"✅ {len(event_ids) - len(failed)} evento(s) eliminado(s)."
+    if failed:
+        text += "\n⚠️ No se pudieron eliminar: " + ", ".join(failed)
+    context.user_data.get("del_all", {}).pop(query.message.message_id, None)
+    await query.edit_message_text(text)
 
 
 def get_delete_callback_handler() -> CallbackQueryHandler:
     """Devuelve el handler para callbacks de eliminación."""
-    return CallbackQueryHandler(confirmar_eliminacion, pattern=r"^del_")
+    return CallbackQueryHandler(confirmar_eliminacion, pattern=r"^del_", block=False)
@@ -1,21 +1,50 @@
 """Handlers para listar eventos — /agenda y /hoy."""
 
+import asyncio
 import logging
+from datetime import datetime
+from io import StringIO
+
 from telegram import Update
+from telegram.constants import MessageLimit
 from telegram.ext import ContextTypes
 
-from calendar_service import CalendarService, format_event
+from calendar_service import TZ, format_event, get_shared_calendar_service
 
 logger = logging.getLogger(__name__)
 
+# Margen bajo el límite de Telegram para el aviso "(+N más)"
+_TEXT_BUDGET = MessageLimit.MAX_TEXT_LENGTH - 100
+
+
+def _render_events(header: str, events: list[dict], now: datetime) -> str:
+    """Arma un único mensaje con los eventos, cortado antes del límite de Telegram.
+
+    Un mensaje de más de 4096 caracteres lo rechaza la API (400) y no se
+    envía nada; así se muestran los que entran y se avisa cuántos faltan.
+    """
+    buf = StringIO()
+    buf.write(header)
+    shown = 0
+    for event in events:
+        block = format_event(event, now=now)
+        if buf.tell() + len(block) + 2 > _TEXT_BUDGET:
+            break
+        buf.write("\n\n")
+        buf.write(block)
+        shown += 1
+    if shown < len(events):
+        buf.write(f"\n\n…(+{len(events) - shown} más)")
+    return buf.getvalue()
+
 
 async def agenda_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Muestra los eventos de los próximos 7 días."""
     await update.message.reply_text("🔍 Buscando eventos de la semana...")
 
     try:
-        cal = CalendarService()
-        events = cal.get_upcoming_events(days=7)
+        cal = get_shared_calendar_service()
+        events = await asyncio.to_thread(cal.get_upcoming_events, days=7)
 
         if not events:
             await update.message.reply_text(
@@ -24,16 +53,14 @@ async def agenda_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
 
-        lines = ["📅 *Tu agenda de los próximos 7 días:*\n"]
-        for event in events:
-            lines.append(format_event(event))
+        text = _render_events("📅 *Tu agenda de los próximos 7 días:*\n", events, datetime.now(TZ))
 
         await update.message.reply_text(
-            "\n\n".join(lines),
+            text,
             parse_mode="Markdown",
         )
     except Exception as e:
-        logger.error(f"Error listando agenda: {e}")
+        logger.error("Error listando agenda: %s", e)
         await update.message.reply_text(f"❌ Error al obtener la agenda: {e}")
 
 
@@ -42,8 +69,8 @@ async def hoy_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔍 Buscando eventos de hoy...")
 
     try:
-        cal = CalendarService()
-        events = cal.get_today_events()
+        cal = get_shared_calendar_service()
+        events = await asyncio.to_thread(cal.get_today_events)
 
         if not events:
             await update.message.reply_text(
@@ -52,14 +79,12 @@ async def hoy_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
 
-        lines = [f"📅 *Eventos de hoy* ({len(events)}):\n"]
-        for event in events:
-            lines.append(format_event(event))
+        text = _render_events(f"📅 *Eventos de hoy* ({len(events)}):\n", events, datetime.now(TZ))
 
         await update.message.reply_text(
-            "\n\n".join(lines),
+            text,
             parse_mode="Markdown",
         )
     except Exception as e:
-        logger.error(f"Error listando eventos de hoy: {e}")
+        logger.error("Error listando eventos de hoy: %s", e)
         await update.message.reply_text(f"❌ Error al obtener eventos: {e}")
@@ -1,60 +1,118 @@
 """Handler para mensajes de texto libre — procesamiento con NLP."""
 
+import asyncio
 import logging
-from datetime import datetime
+import re
+from datetime import date, datetime, timedelta, time as dt_time
+from io import StringIO
 
-import pytz
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
 
-import config
-from calendar_service import CalendarService, format_event
-from nlp_processor import parse_user_message
+from calendar_service import (
+    TZ,
+    fold_text,
+    format_event,
+    get_shared_calendar_service,
+    is_completed,
+    parse_datetime,
+    search_title,
+    truncate_label,
+)
+from handlers.complete_event import (
+    completion_keyboard,
+    remember_for_complete_all,
+    remember_for_completion,
+)
+from handlers.delete_event import (
+    DELETE_ALL_CALLBACK,
+    remember_for_delete_all,
+    remember_for_deletion,
+)
+from handlers.supplements import handle_suplemento_nlp
+from nlp_processor import parse_user_message_async
 
 logger = logging.getLogger(__name__)
-TZ = pytz.timezone(config.TIMEZONE)
+
+# callback_data de los botones de confirmación de este módulo
+_NLP_CALLBACK_RE = re.compile(r"^confirm_nlp_")
+
+# Teclados fijos (los botones son inmutables: se construyen una sola vez)
+_CONFIRM_MARKUP = InlineKeyboardMarkup([[
+    InlineKeyboardButton("✅ Confirmar", callback_data="confirm_nlp_yes"),
+    InlineKeyboardButton("❌ Cancelar", callback_data="confirm_nlp_no"),
+]])
+_DELETE_CANCEL_ROW = [InlineKeyboardButton("❌ Cancelar", callback_data="del_cancelar")]
+
+# Mensajes fijos
+_FALLBACK_MSG = (
+    "No entendí bien. Prueba con algo como:\n"
+    '• _"Reunión mañana a las 3pm"_\n'
+    '• _"¿Qué tengo hoy?"_\n'
+    '• _"Anotar Omega 3 todos los días a las 9 am"_\n'
+    '• _"Elimina la reunión del viernes"_'
+)
+_BAD_DATE_MSG = "❌ No pude interpretar la fecha correctamente."
+_NLP_ERROR_MSG = "❌ Error procesando el mensaje. Intenta de nuevo."
+
+
+# Caracteres que Telegram interpreta en parse_mode="Markdown"
+_MARKDOWN_CHARS = frozenset("*_[`")
+
+
+def _markdown_kwargs(text: str) -> dict:
+    """parse_mode Markdown solo si el texto tiene marcas: sin ellas se manda plano."""
+    return {"parse_mode": "Markdown"} if not _MARKDOWN_CHARS.isdisjoint(text) else {}
+
+
+def _match_title(events: list[dict], titulo: str) -> list[dict]:
+    """Eventos cuyo título contiene `titulo` (sin distinguir mayúsculas ni tildes)."""
+    needle = fold_text(titulo)
+    return [e for e in events if needle in search_title(e)]
 
 
 async def handle_natural_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Procesa mensajes de texto libre usando Gemini NLP."""
     text = update.message.text
 
-    # Mostrar que estamos procesando
-    processing_msg = await update.message.reply_text("🤔 Procesando tu mensaje...")
-
-    try:
-        result = parse_user_message(text)
-    except Exception as e:
-        logger.error(f"Error en NLP: {e}")
-        await processing_msg.edit_text("❌ Error procesando el mensaje. Intenta de nuevo.")
+    # Mostrar que estamos procesando mientras Gemini ya trabaja: el aviso y la
+    # consulta NLP son independientes, así que van en paralelo.
+    processing_msg, result = await asyncio.gather(
+        update.message.reply_text("🤔 Procesando tu mensaje..."),
+        parse_user_message_async(text),
+        return_exceptions=True,
+    )
+    if isinstance(processing_msg, BaseException):
+        raise processing_msg
+
+    if isinstance(result, BaseException):
+        logger.error(f"Error en NLP: {result}")
+        await processing_msg.edit_text(_NLP_ERROR_MSG)
         return
 
-    intencion = result.get("intencion", "otro")
-    datos = result.get("datos", {})
-    respuesta = result.get("respuesta", "")
-
-    if intencion == "crear":
-        await handle_crear(update, context, processing_msg, datos, respuesta)
-    elif intencion == "listar":
-        await handle_listar(update, context, processing_msg, datos, respuesta)
-    elif intencion == "eliminar":
-        await handle_eliminar(update, context, processing_msg, datos, respuesta)
-    elif intencion == "completar":
-        await handle_completar(update, context, processing_msg, datos, respuesta)
-    elif intencion == "consultar":
-        await handle_consultar(update, context, processing_msg, datos, respuesta)
-    elif intencion == "suplementacion":
-        from handlers.supplements import handle_suplemento_nlp
-        await handle_suplemento_nlp(update, context, processing_msg, datos, respuesta, intencion_original=intencion)
-    else:
-        await processing_msg.edit_text(
-            respuesta or "No entendí bien. Prueba con algo como:\n"
-            '• _"Reunión mañana a las 3pm"_\n'
-            '• _"¿Qué tengo hoy?"_\n'
-            '• _"Anotar Omega 3 todos los días a las 9 am"_\n'
-            '• _"Elimina la reunión del viernes"_',
-            parse_mode="Markdown",
-        )
+    handler = INTENT_HANDLERS.get(result.get("intencion", "otro"), handle_otro)
+    await handler(
+        update, context, processing_msg, result.get("datos", {}), result.get("respuesta", "")
+    )
+
+
+async def handle_otro(update, context, processing_msg, datos, respuesta):
+    """Respuesta para mensajes que no son de agenda (o intención desconocida)."""
+    text = respuesta or _FALLBACK_MSG
+    await processing_msg.edit_text(text, **_markdown_kwargs(text))
+
+
+async def handle_suplementacion(update, context, processing_msg, datos, respuesta):
+    """Deriva la intención de suplementos a su handler."""
+    await handle_suplemento_nlp(
+        update, context, processing_msg, datos, respuesta, intencion_original="suplementacion"
+    )
+
+
+def _parse_hm(value: str) -> dt_time:
+    """Convierte "HH:MM" (formato que devuelve el NLP) en time; ValueError si no."""
+    h, m = value.split(":", 1)
+    return dt_time(int(h), int(m))
 
 
 async def handle_crear(update, context, processing_msg, datos, respuesta):
@@ -101,32 +159,31 @@ async def handle_crear(update, context, processing_msg, datos, respuesta):
         return
 
     try:
-        from datetime import timedelta, time as dt_time
-        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+        fecha = date.fromisoformat(fecha_str)
         
         # Determinar si es todo el día: si el modelo dice que sí, o si no hay hora de inicio
         # Excepción: si es suplementación (pero aquí estamos en handle_crear, así que no aplica)
         is_all_day = dia_completo or not hora_inicio
         
         if is_all_day:
-            start_dt = TZ.localize(datetime.combine(fecha, dt_time.min))
+            start_dt = datetime.combine(fecha, dt_time.min, tzinfo=TZ)
             end_dt = start_dt + timedelta(days=1)
             all_day = True
             time_str = "Todo el día"
         else:
             try:
-                hora = datetime.strptime(hora_inicio, "%H:%M").time()
-                start_dt = TZ.localize(datetime.combine(fecha, hora))
+                hora = _parse_hm(hora_inicio)
+                start_dt = datetime.combine(fecha, hora, tzinfo=TZ)
                 if hora_fin:
-                    h_fin = datetime.strptime(hora_fin, "%H:%M").time()
-                    end_dt = TZ.localize(datetime.combine(fecha, h_fin))
+                    h_fin = _parse_hm(hora_fin)
+                    end_dt = datetime.combine(fecha, h_fin, tzinfo=TZ)
                 else:
                     end_dt = start_dt + timedelta(hours=1)
                 all_day = False
                 time_str = f"{hora_inicio}"
             except ValueError:
                 # Fallback a todo el día si la hora está mal formateada
-                start_dt = TZ.localize(datetime.combine(fecha, dt_time.min))
+                start_dt = datetime.combine(fecha, dt_time.min, tzinfo=TZ)
                 end_dt = start_dt + timedelta(days=1)
                 all_day = True
                 time_str = "Todo el día"
@@ -146,25 +203,19 @@ async def handle_crear(update, context, processing_msg, datos, respuesta):
         # 🧠 DETECCIÓN DE CONFLICTOS
         warning_conflict = ""
         if not all_day:
-            cal = CalendarService()
-            conflicts = cal.check_conflicts(start_dt, end_dt)
+            cal = get_shared_calendar_service()
+            conflicts = await asyncio.to_thread(cal.check_conflicts, start_dt, end_dt)
             if conflicts:
                 n = len(conflicts)
-                warning_conflict = f"\n\n⚠️ *CONFLICTO:* Tienes {n} evento(s) a esa misma hora."
+                warning_conflict = f"\n\n⚠️ *CONFLICTO:* Ese horario se solapa con {n} evento(s) con hora."
 
         # Construir resumen para confirmación
         prio_emoji = {"alta": "🔴", "media": "🟡", "baja": "🟢"}.get(prioridad, "🟡")
-        meta_info = f"\n❗ *Prio:* {prio_emoji} {prioridad.capitalize()} | 🏷️ #{categoria}"
-        if ubicacion:
-            meta_info += f"\n📍 *Ubicación:* {ubicacion}"
-
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Confirmar", callback_data="confirm_nlp_yes"),
-                InlineKeyboardButton("❌ Cancelar", callback_data="confirm_nlp_no"),
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        location_info = f"\n📍 *Ubicación:* {ubicacion}" if ubicacion else ""
+        meta_info = (
+            f"\n❗ *Prio:* {prio_emoji} {prioridad.capitalize()} | 🏷️ #{categoria}"
+            f"{location_info}"
+        )
 
         await processing_msg.edit_text(
             f"¿Confirmas este evento?{warning_conflict}\n\n"
@@ -173,7 +224,7 @@ async def handle_crear(update, context, processing_msg, datos, respuesta):
             f"{meta_info}\n"
             f"{'📝 ' + descripcion if descripcion else ''}",
             parse_mode="Markdown",
-            reply_markup=reply_markup,
+            reply_markup=_CONFIRM_MARKUP,
         )
 
     except Exception as e:
@@ -197,8 +248,9 @@ async def confirmar_nlp_crear(update: Update, context: ContextTypes.DEFAULT_TYPE
         event_data = context.user_data.pop("confirm_event", None)
         if event_data:
             try:
-                cal = CalendarService()
-                event = cal.create_event(
+                cal = get_shared_calendar_service()
+                event = await asyncio.to_thread(
+                    cal.create_event,
                     summary=event_data["summary"],
                     start_dt=event_data["start_dt"],
                     end_dt=event_data["end_dt"],
@@ -221,44 +273,53 @@ async def confirmar_nlp_crear(update: Update, context: ContextTypes.DEFAULT_TYPE
             await query.edit_message_text("❌ No hay evento pendiente para crear.")
 
 
+def _is_pending(event: dict, now_ts: float) -> bool:
+    """True si el evento no está completado y no terminó todavía.
+
+    Las tareas de día completo cuentan como pendientes todo el día. Se
+    comparan timestamps: no hace falta pasar las horas a la zona local.
+    """
+    if is_completed(event):
+        return False
+    start = event.get("start", {})
+    if "dateTime" not in start:
+        return "date" in start
+    # Incluir si: no ha empezado O si ya empezó pero no ha terminado
+    end = event.get("end", {})
+    if "dateTime" in end:
+        return parse_datetime(end["dateTime"]).timestamp() > now_ts
+    return parse_datetime(start["dateTime"]).timestamp() > now_ts
+
+
+def _write_section(buf: StringIO, title: str, events: list[dict], now: datetime):
+    """Escribe un bloque "título + eventos" separado por líneas en blanco."""
+    buf.write(f"\n\n{title}")
+    for event in events:
+        buf.write("\n\n")
+        buf.write(format_event(event, show_past_marker=False, now=now))
+
+
 async def handle_listar(update, context, processing_msg, datos, respuesta):
     """Lista eventos: tareas pendientes + eventos futuros, con soporte para fecha específica."""
     try:
-        cal = CalendarService()
+        cal = get_shared_calendar_service()
         rango = datos.get("rango_dias", 7)
         fecha_especifica_str = datos.get("fecha")
         
         now = datetime.now(TZ)
-        from reminder_scheduler import COMPLETED_MARKER
 
         if fecha_especifica_str:
             # Caso A: El usuario pidió una fecha específica (ej: "qué tengo mañana")
             try:
-                fecha_req = datetime.strptime(fecha_especifica_str, "%Y-%m-%d").date()
-                start_req = TZ.localize(datetime.combine(fecha_req, datetime.min.time()))
-                end_req = TZ.localize(datetime.combine(fecha_req, datetime.max.time()))
+                fecha_req = date.fromisoformat(fecha_especifica_str)
+                start_req = datetime.combine(fecha_req, dt_time.min, tzinfo=TZ)
+                end_req = datetime.combine(fecha_req, dt_time.max, tzinfo=TZ)
                 
-                events = cal.list_events(start_req, end_req)
+                events = await asyncio.to_thread(cal.list_events, start_req, end_req)
                 
                 # Filtrar: no mostrar pasados con hora, mantener tareas todo el día
-                filtered = []
-                for e in events:
-                    if COMPLETED_MARKER in e.get("description", ""):
-                        continue
-                    
-                    start = e.get("start", {})
-                    if "date" in start and "dateTime" not in start:
-                        filtered.append(e)
-                    elif "dateTime" in start:
-                        dt_start = datetime.fromisoformat(start["dateTime"]).astimezone(TZ)
-                        end = e.get("end", {})
-                        if "dateTime" in end:
-                            dt_end = datetime.fromisoformat(end["dateTime"]).astimezone(TZ)
-                            # Incluir si: no ha empezado O si ya empezó pero no ha terminado
-                            if dt_start > now or dt_end > now:
-                                filtered.append(e)
-                        elif dt_start > now:
-                            filtered.append(e)
+                now_ts = now.timestamp()
+                filtered = [e for e in events if _is_pending(e, now_ts)]
                 
                 if not filtered:
                     await processing_msg.edit_text(
@@ -266,47 +327,33 @@ async def handle_listar(update, context, processing_msg, datos, respuesta):
                     )
                     return
 
-                lines = [f"{respuesta}\n"]
-                lines.append(f"📅 *Agenda para el {fecha_req.strftime('%d/%m/%Y')}*:\n")
-                for e in filtered:
-                    lines.append(format_event(e, show_past_marker=False))
-                
-                await processing_msg.edit_text("\n\n".join(lines), parse_mode="Markdown")
+                buf = StringIO()
+                buf.write(respuesta)
+                _write_section(
+                    buf, f"📅 *Agenda para el {fecha_req.strftime('%d/%m/%Y')}*:", filtered, now
+                )
+                await processing_msg.edit_text(buf.getvalue(), parse_mode="Markdown")
                 
             except ValueError:
-                await processing_msg.edit_text("❌ No pude interpretar la fecha correctamente.")
+                await processing_msg.edit_text(_BAD_DATE_MSG)
                 return
 
         else:
             # Caso B: Listado general (Próximos 7 días)
             # 1. Tareas de HOY que no fueron completadas (aunque la hora pasó, si son tareas)
-            today_events = cal.get_today_events()
-            pending_today = []
-
-            for e in today_events:
-                if COMPLETED_MARKER in e.get("description", ""):
-                    continue
-                
-                start = e.get("start", {})
-                if "date" in start and "dateTime" not in start:
-                    pending_today.append(e)
-                elif "dateTime" in start:
-                    dt_start = datetime.fromisoformat(start["dateTime"]).astimezone(TZ)
-                    end = e.get("end", {})
-                    if "dateTime" in end:
-                        dt_end = datetime.fromisoformat(end["dateTime"]).astimezone(TZ)
-                        if dt_start > now or dt_end > now:
-                            pending_today.append(e)
-                    elif dt_start > now:
-                        pending_today.append(e)
-
             # 2. Eventos futuros (desde mañana hasta el rango solicitado)
-            from datetime import timedelta, time as dt_time
-            tomorrow_start = TZ.localize(datetime.combine(
-                now.date() + timedelta(days=1), dt_time.min
-            ))
+            # Son lecturas independientes: se piden a la vez.
+            tomorrow_start = datetime.combine(
+                now.date() + timedelta(days=1), dt_time.min, tzinfo=TZ
+            )
             end_range = tomorrow_start + timedelta(days=rango - 1)
-            future_events = cal.list_events(tomorrow_start, end_range) if rango > 1 else []
+            today_events, future_events = await asyncio.gather(
+                asyncio.to_thread(cal.get_today_events),
+                asyncio.to_thread(cal.list_events, tomorrow_start, end_range)
+                if rango > 1 else asyncio.sleep(0, result=[]),
+            )
+            now_ts = now.timestamp()
+            pending_today = [e for e in today_events if _is_pending(e, now_ts)]
 
             all_events = pending_today + future_events
 
@@ -316,19 +363,16 @@ async def handle_listar(update, context, processing_msg, datos, respuesta):
                 )
                 return
 
-            lines = [f"{respuesta}\n"]
+            buf = StringIO()
+            buf.write(respuesta)
             if pending_today:
-                lines.append(f"📋 *Pendientes de hoy* ({len(pending_today)}):\n")
-                for event in pending_today:
-                    lines.append(format_event(event, show_past_marker=False))
-                lines.append("")
-
+                _write_section(
+                    buf, f"📋 *Pendientes de hoy* ({len(pending_today)}):", pending_today, now
+                )
             if future_events:
-                lines.append(f"📅 *Próximos días*:\n")
-                for event in future_events:
-                    lines.append(format_event(event, show_past_marker=False))
+                _write_section(buf, "📅 *Próximos días*:", future_events, now)
 
-            await processing_msg.edit_text("\n\n".join(lines), parse_mode="Markdown")
+            await processing_msg.edit_text(buf.getvalue(), parse_mode="Markdown")
         
     except Exception as e:
         logger.error(f"Error listando eventos NLP: {e}")
@@ -340,8 +384,16 @@ async def handle_eliminar(update, context, processing_msg, datos, respuesta):
     titulo_buscar = datos.get("titulo", "")
 
     try:
-        cal = CalendarService()
-        events = cal.get_upcoming_events(days=30)
+        cal = get_shared_calendar_service()
+        # Si el usuario dijo el día ("la reunión de mañana"), buscar solo en ese día
+        try:
+            fecha = date.fromisoformat(datos["fecha"]) if datos.get("fecha") else None
+        except ValueError:
+            fecha = None
+        if fecha:
+            events = await asyncio.to_thread(cal.get_events_on, fecha)
+        else:
+            events = await asyncio.to_thread(cal.get_upcoming_events, days=30)
 
         if not events:
             await processing_msg.edit_text(
@@ -351,10 +403,7 @@ async def handle_eliminar(update, context, processing_msg, datos, respuesta):
 
         # Buscar coincidencias por nombre
         if titulo_buscar:
-            matches = [
-                e for e in events
-                if titulo_buscar.lower() in e.get("summary", "").lower()
-            ]
+            matches = _match_title(events, titulo_buscar)
         else:
             matches = events[:10]
 
@@ -365,22 +414,24 @@ async def handle_eliminar(update, context, processing_msg, datos, respuesta):
             )
             return
 
-        context.user_data["eventos_para_eliminar"] = {
-            e["id"]: e.get("summary", "Sin título") for e in matches
-        }
+        shown = matches[:10]
+        remember_for_deletion(context, shown)
 
-        keyboard = []
-        for event in matches[:10]:
-            summary = event.get("summary", "Sin título")
-            label = f"🗑️ {summary}"
-            if len(label) > 60:
-                label = label[:57] + "..."
-            keyboard.append([
-                InlineKeyboardButton(label, callback_data=f"del_{event['id']}")
-            ])
-        keyboard.append([
-            InlineKeyboardButton("❌ Cancelar", callback_data="del_cancelar")
-        ])
+        labels = ((e["id"], f"🗑️ {e.get('summary') or 'Sin título'}") for e in shown)
+        keyboard = [
+            [InlineKeyboardButton(
+                truncate_label(label),
+                callback_data=f"del_{event_id}",
+            )]
+            for event_id, label in labels
+        ]
+        # El borrado masivo solo se ofrece sobre lo que coincidió con un título
+        if titulo_buscar and len(shown) > 1:
+            remember_for_delete_all(context, processing_msg.message_id, shown)
+            keyboard.append([InlineKeyboardButton(
+                f"🗑️ Borrar todos ({len(shown)})", callback_data=DELETE_ALL_CALLBACK
+            )])
+        keyboard.append(_DELETE_CANCEL_ROW)
 
         await processing_msg.edit_text(
             f"{respuesta}\n\n🗑️ *¿Cuál quieres eliminar?*",
@@ -394,18 +445,14 @@ async def handle_eliminar(update, context, processing_msg, datos, respuesta):
 
 async def handle_completar(update, context, processing_msg, datos, respuesta):
     """Marca una tarea como completada buscándola por nombre."""
-    from reminder_scheduler import COMPLETED_MARKER
     titulo_buscar = datos.get("titulo", "")
 
     try:
-        cal = CalendarService()
-        today_events = cal.get_today_events()
+        cal = get_shared_calendar_service()
+        today_events = await asyncio.to_thread(cal.get_today_events)
 
         # Buscar pendientes (no completadas)
-        pending = [
-            e for e in today_events
-            if COMPLETED_MARKER not in e.get("description", "")
-        ]
+        pending = [e for e in today_events if not is_completed(e)]
 
         if not pending:
             await processing_msg.edit_text(
@@ -415,10 +462,7 @@ async def handle_completar(update, context, processing_msg, datos, respuesta):
 
         # Buscar coincidencia por nombre
         if titulo_buscar:
-            matches = [
-                e for e in pending
-                if titulo_buscar.lower() in e.get("summary", "").lower()
-            ]
+            matches = _match_title(pending, titulo_buscar)
         else:
             matches = []
 
@@ -428,14 +472,10 @@ async def handle_completar(update, context, processing_msg, datos, respuesta):
             event_id = event["id"]
             summary = event.get("summary", "tarea")
 
-            service = cal.service
-            full_event = service.events().get(
-                calendarId=cal.calendar_id, eventId=event_id
-            ).execute()
-
-            current_desc = full_event.get("description", "")
-            new_desc = f"{COMPLETED_MARKER} ✅\n{current_desc}".strip()
-            cal.update_event(event_id, {"description": new_desc})
+            # La descripción ya viene en el listado de hoy: no hace falta otro GET
+            await asyncio.to_thread(
+                cal.mark_completed, event_id, event.get("description", "")
+            )
 
             await processing_msg.edit_text(
                 f"✅ *{summary}* marcada como completada! 🎉",
@@ -443,48 +483,21 @@ async def handle_completar(update, context, processing_msg, datos, respuesta):
             )
         elif len(matches) > 1:
             # Múltiples matches: ofrecer selección
-            context.user_data["eventos_completar"] = {
-                e["id"]: e.get("summary", "Sin título") for e in matches
-            }
-            keyboard = []
-            for event in matches:
-                summary = event.get("summary", "Sin título")
-                label = f"✅ {summary}"
-                if len(label) > 60:
-                    label = label[:57] + "..."
-                keyboard.append([
-                    InlineKeyboardButton(label, callback_data=f"comp_{event['id']}")
-                ])
-            keyboard.append([
-                InlineKeyboardButton("❌ Cancelar", callback_data="comp_cancelar")
-            ])
+            remember_for_completion(context, matches)
+            remember_for_complete_all(context, processing_msg.message_id, matches)
             await processing_msg.edit_text(
                 f"{respuesta}\n\nEncontré varias coincidencias. ¿Cuál completaste?",
                 parse_mode="Markdown",
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=completion_keyboard(matches, allow_all=True),
             )
         else:
             # Sin coincidencias: mostrar todas las pendientes
-            context.user_data["eventos_completar"] = {
-                e["id"]: e.get("summary", "Sin título") for e in pending
-            }
-            keyboard = []
-            for event in pending:
-                summary = event.get("summary", "Sin título")
-                label = f"✅ {summary}"
-                if len(label) > 60:
-                    label = label[:57] + "..."
-                keyboard.append([
-                    InlineKeyboardButton(label, callback_data=f"comp_{event['id']}")
-                ])
-            keyboard.append([
-                InlineKeyboardButton("❌ Cancelar", callback_data="comp_cancelar")
-            ])
+            remember_for_completion(context, pending)
             await processing_msg.edit_text(
                 f"{respuesta}\n\nNo encontré una coincidencia exacta. "
                 "¿Cuál completaste?",
                 parse_mode="Markdown",
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=completion_keyboard(pending),
             )
     except Exception as e:
         logger.error(f"Error completando tarea NLP: {e}")
@@ -494,15 +507,17 @@ async def handle_completar(update, context, processing_msg, datos, respuesta):
 async def handle_consultar(update, context, processing_msg, datos, respuesta):
     """Responde consultas sobre la agenda."""
     try:
-        cal = CalendarService()
-        events = cal.get_upcoming_events(days=7)
+        cal = get_shared_calendar_service()
+        events = await asyncio.to_thread(cal.get_upcoming_events, days=7)
 
         if events:
-            lines = [f"{respuesta}\n"]
+            buf = StringIO()
+            buf.write(respuesta)
             for event in events[:5]:
-                lines.append(format_event(event))
+                buf.write("\n\n")
+                buf.write(format_event(event))
             await processing_msg.edit_text(
-                "\n\n".join(lines),
+                buf.getvalue(),
                 parse_mode="Markdown",
             )
         else:
@@ -514,6 +529,17 @@ async def handle_consultar(update, context, processing_msg, datos, respuesta):
         await processing_msg.edit_text(f"❌ Error: {e}")
 
 
+# Intención del NLP → handler (firma: update, context, processing_msg, datos, respuesta)
+INTENT_HANDLERS = {
+    "crear": handle_crear,
+    "listar": handle_listar,
+    "eliminar": handle_eliminar,
+    "completar": handle_completar,
+    "consultar": handle_consultar,
+    "suplementacion": handle_suplementacion,
+}
+
+
 def get_nlp_callback_handler() -> CallbackQueryHandler:
     """Devuelve el handler para callbacks de NLP crear."""
-    return CallbackQueryHandler(confirmar_nlp_crear, pattern=r"^confirm_nlp_")
+    return CallbackQueryHandler(confirmar_nlp_crear, pattern=_NLP_CALLBACK_RE, block=False)
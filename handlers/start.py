@@ -8,6 +8,22 @@ import config
 
 logger = logging.getLogger(__name__)
 
+# Parte fija de la bienvenida (solo el saludo y el ID dependen del usuario)
+_WELCOME_BODY = (
+    "Soy tu **asistente de agenda** 📅\n"
+    "Estoy conectado a tu Google Calendar y puedo ayudarte a:\n\n"
+    "✅ **Crear eventos** — envíame un mensaje como:\n"
+    '   _"Reunión con Juan mañana a las 3pm"_\n'
+    '   _"Dentista el viernes a las 10"_\n\n'
+    "📋 **Ver tu agenda** — /agenda o /hoy\n"
+    "🗑️ **Eliminar eventos** — /eliminar\n"
+    "✔️ **Completar tareas** — /completar\n"
+    "➕ **Crear paso a paso** — /nuevo\n\n"
+    "⏰ **Recordatorios automáticos** cada 2 horas (6:30 a 00:00)\n"
+    "🔄 Las tareas no completadas se renuevan al día siguiente\n\n"
+    "También puedes escribirme en lenguaje natural y yo interpreto lo que necesitas.\n\n"
+)
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Maneja el comando /start — bienvenida e información del bot."""
@@ -16,18 +32,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     welcome = (
         f"👋 ¡Hola {user.first_name}!\n\n"
-        "Soy tu **asistente de agenda** 📅\n"
-        "Estoy conectado a tu Google Calendar y puedo ayudarte a:\n\n"
-        "✅ **Crear eventos** — envíame un mensaje como:\n"
-        '   _"Reunión con Juan mañana a las 3pm"_\n'
-        '   _"Dentista el viernes a las 10"_\n\n'
-        "📋 **Ver tu agenda** — /agenda o /hoy\n"
-        "🗑️ **Eliminar eventos** — /eliminar\n"
-        "✔️ **Completar tareas** — /completar\n"
-        "➕ **Crear paso a paso** — /nuevo\n\n"
-        "⏰ **Recordatorios automáticos** cada 2 horas (6:30 a 00:00)\n"
-        "🔄 Las tareas no completadas se renuevan al día siguiente\n\n"
-        "También puedes escribirme en lenguaje natural y yo interpreto lo que necesitas.\n\n"
+        f"{_WELCOME_BODY}"
         f"🔑 Tu ID de usuario: `{user_id}`\n"
     )
 
@@ -1,10 +1,9 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
-from supplement_service import SupplementService
+from supplement_service import get_supplement_service
 from datetime import datetime, timedelta
-import pytz
-import config
+from calendar_service import TZ
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +21,7 @@ async def handle_suplemento_nlp(update: Update, context: ContextTypes.DEFAULT_TY
             es_consulta = True
             
     if es_consulta:
-        service = SupplementService()
+        service = get_supplement_service()
         all_supplements = service.get_all()
         
         if not all_supplements:
@@ -32,16 +31,8 @@ async def handle_suplemento_nlp(update: Update, context: ContextTypes.DEFAULT_TY
 
         lines = [f"{respuesta or '💊 Tus suplementos registrados:'}\n"]
         
-        # Agrupar por hora
-        by_time = {}
-        for s in all_supplements:
-            if not s.get("active", True): continue
-            t = s["time"]
-            if t not in by_time: by_time[t] = []
-            by_time[t].append(s["name"])
-            
-        for t in sorted(by_time.keys()):
-            names = ", ".join(by_time[t])
+        for t, supps in service.get_by_time().items():
+            names = ", ".join(s["name"] for s in supps)
             lines.append(f"• *{t}*: {names}")
             
         await processing_msg.edit_text("\n".join(lines), parse_mode="Markdown")
@@ -69,16 +60,7 @@ async def handle_suplemento_nlp(update: Update, context: ContextTypes.DEFAULT_TY
         # Validar formato de hora
         datetime.strptime(hora, "%H:%M")
         
-        service = SupplementService()
-        added = []
-        already_exist = []
-        
-        for sup in suplementos:
-            success = service.add_supplement(sup, hora)
-            if success:
-                added.append(sup)
-            else:
-                already_exist.append(sup)
+        added, already_exist = get_supplement_service().add_supplements(suplementos, hora)
         
         msg_parts = []
         if added:
@@ -106,9 +88,9 @@ async def supplement_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
     action = data[0] # 'supp_done', 'supp_snooze', 'supp_t_done' o 'supp_t_snooze'
     payload = data[1] # Lista de nombres (old) o HH:MM (new)
 
-    service = SupplementService()
-    today = datetime.now().strftime("%Y-%m-%d")
-    tz = pytz.timezone(config.TIMEZONE)
+    service = get_supplement_service()
+    now = datetime.now(TZ)
+    today = now.strftime("%Y-%m-%d")
     
     # NUEVOS: Basados en tiempo (agrupados)
     if action == "supp_t_done":
@@ -118,7 +100,7 @@ async def supplement_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
             parse_mode="Markdown"
         )
     elif action == "supp_t_snooze":
-        next_time = datetime.now(tz) + timedelta(minutes=30)
+        next_time = now + timedelta(minutes=30)
         service.set_next_reminder_by_time(payload, next_time.isoformat())
         await query.edit_message_text(
             f"⏳ Entendido. Te volveré a preguntar por los suplementos de las *{payload}* en 30 minutos. ¡No se te olvide! 💊",
@@ -135,7 +117,7 @@ async def supplement_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
     elif action == "supp_snooze":
         names = payload.split(",")
-        next_time = datetime.now(tz) + timedelta(minutes=30)
+        next_time = now + timedelta(minutes=30)
         service.set_next_reminder(names, next_time.isoformat())
         await query.edit_message_text(
             f"⏳ Entendido. Te volveré a preguntar por *{', '.join(names)}* en 30 minutos. ¡No se te olvide! 💊",
@@ -145,7 +127,7 @@ async def supplement_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def debug_suplementos_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Comando de depuración para ver el estado interno de los suplementos."""
-    service = SupplementService()
+    service = get_supplement_service()
     all_s = service.get_all()
     
     if not all_s:
@@ -153,8 +135,7 @@ async def debug_suplementos_command(update: Update, context: ContextTypes.DEFAUL
         return
         
     lines = ["🧪 *Estado de Suplementos (Debug):*"]
-    tz = pytz.timezone(config.TIMEZONE)
-    now = datetime.now(tz)
+    now = datetime.now(TZ)
     
     for s in all_s:
         status = "✅" if s.get("active", True) else "❌"
@@ -170,7 +151,7 @@ async def debug_suplementos_command(update: Update, context: ContextTypes.DEFAUL
             try:
                 nr_dt = datetime.fromisoformat(next_rem)
                 if nr_dt.tzinfo is None:
-                    nr_dt = tz.localize(nr_dt)
+                    nr_dt = nr_dt.replace(tzinfo=TZ)
                 
                 diff = nr_dt - now
                 diff_sec = int(diff.total_seconds())
@@ -178,7 +159,7 @@ async def debug_suplementos_command(update: Update, context: ContextTypes.DEFAUL
                     line.append(f"  - Reintento en: `{diff_sec // 60}m {diff_sec % 60}s`")
                 else:
                     line.append(f"  - Reintento: `VENCIDO` (hace {-diff_sec // 60}m)")
-            except:
+            except (TypeError, ValueError):
                 line.append(f"  - Reintento: `{next_rem}`")
         else:
               line.append("  - Reintento: `Ninguno` (esperando hora exacta)")
@@ -189,4 +170,4 @@ async def debug_suplementos_command(update: Update, context: ContextTypes.DEFAUL
 
 
 def get_supplement_callback_handler() -> CallbackQueryHandler:
-    return CallbackQueryHandler(supplement_callback, pattern=r"^supp_")
+    return CallbackQueryHandler(supplement_callback, pattern=r"^supp_", block=False)
@@ -1,22 +1,20 @@
 """Handler para mensajes de voz — transcripción y procesamiento con NLP."""
 
 import logging
-import os
-import tempfile
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from nlp_processor import parse_voice_message
-from handlers.natural_language import (
-    handle_crear,
-    handle_listar,
-    handle_eliminar,
-    handle_completar,
-    handle_consultar,
-)
+from nlp_processor import parse_voice_message_async
+from handlers.natural_language import INTENT_HANDLERS
 
 logger = logging.getLogger(__name__)
 
+_NOT_UNDERSTOOD_MSG = (
+    "Lo siento, escuché el audio pero no pude identificar qué quieres hacer. "
+    "Prueba hablando más claro o enviando el texto."
+)
+
 
 async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Descarga el audio y lo procesa con Gemini."""
@@ -28,42 +26,23 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     processing_msg = await update.message.reply_text("🎧 Escuchando tu mensaje...")
 
     try:
-        # 1. Descargar el archivo a un temporal
-        with tempfile.NamedTemporaryFile(suffix=".oga", delete=False) as tmp:
-            tmp_path = tmp.name
-
+        # 1. Descargar el audio a memoria (las notas de voz pesan pocos KB y
+        # Telegram no entrega archivos de más de 20 MB a los bots)
         file = await context.bot.get_file(voice.file_id)
-        await file.download_to_drive(tmp_path)
+        audio = await file.download_as_bytearray()
 
         # 2. Procesar con Gemini (Audio NLP)
-        try:
-            result = parse_voice_message(tmp_path)
-        finally:
-            # Limpiar archivo temporal
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+        result = await parse_voice_message_async(
+            bytes(audio), voice.mime_type or "audio/ogg"
+        )
 
-        # 3. Extraer intención y datos
-        intencion = result.get("intencion", "otro")
-        datos = result.get("datos", {})
+        # 3. Delegar a los handlers de lenguaje natural (reutilización)
+        handler = INTENT_HANDLERS.get(result.get("intencion", "otro"))
         respuesta = result.get("respuesta", "")
-
-        # 4. Delegar a los handlers de lenguaje natural (reutilización)
-        if intencion == "crear":
-            await handle_crear(update, context, processing_msg, datos, respuesta)
-        elif intencion == "listar":
-            await handle_listar(update, context, processing_msg, datos, respuesta)
-        elif intencion == "eliminar":
-            await handle_eliminar(update, context, processing_msg, datos, respuesta)
-        elif intencion == "completar":
-            await handle_completar(update, context, processing_msg, datos, respuesta)
-        elif intencion == "consultar":
-            await handle_consultar(update, context, processing_msg, datos, respuesta)
-        else:
-            await processing_msg.edit_text(
-                respuesta or "Lo siento, escuché el audio pero no pude identificar qué quieres hacer. "
-                "Prueba hablando más claro o enviando el texto."
-            )
+        if handler is None:
+            await processing_msg.edit_text(respuesta or _NOT_UNDERSTOOD_MSG)
+            return
+        await handler(update, context, processing_msg, result.get("datos", {}), respuesta)
 
     except Exception as e:
         logger.error(f"Error procesando mensaje de voz: {e}")
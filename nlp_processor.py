@@ -3,31 +3,47 @@
 Interpreta mensajes del usuario para extraer intención y datos de eventos.
 """
 
+import copy
+import io
 import json
 import logging
+import re
+from collections import OrderedDict
 from datetime import datetime
-
-import pytz
-from google import genai
+from zoneinfo import ZoneInfo
 
 import config
 
 logger = logging.getLogger(__name__)
 
-TZ = pytz.timezone(config.TIMEZONE)
+TZ = ZoneInfo(config.TIMEZONE)
 
 # Cliente de Gemini (se inicializa al primer uso)
 _client = None
 MODEL = "gemini-2.0-flash"
 
+# Audios más grandes se suben con la Files API en vez de ir inline
+INLINE_AUDIO_LIMIT = 14 * 1024 * 1024
+
 
 def _get_client():
-    """Obtiene o crea el cliente de Gemini (lazy init)."""
+    """Obtiene o crea el cliente de Gemini (lazy init).
+
+    El SDK se importa recién aquí: es lo más pesado del arranque del bot y no
+    hace falta hasta el primer mensaje.
+    """
     global _client
     if _client is None:
+        from google import genai
         _client = genai.Client(api_key=config.GEMINI_API_KEY)
     return _client
 
+
+def _content_config(**kwargs):
+    """Arma la configuración de `generate_content` (importa el SDK al usarse)."""
+    from google.genai import types
+    return types.GenerateContentConfig(**kwargs)
+
 SYSTEM_PROMPT = """Eres un asistente de agenda personal. Tu trabajo es interpretar mensajes del usuario
 en español y extraer la intención y los datos relevantes.
 
@@ -87,109 +103,178 @@ REGLAS IMPORTANTES:
 """
 
 
-def parse_user_message(message: str) -> dict:
+# La zona horaria no cambia: se fija una vez (y se quitan los escapes de
+# str.format) para que solo quede la fecha por rellenar con un replace
+_PROMPT_WITH_TZ = (
+    SYSTEM_PROMPT.replace("{timezone}", config.TIMEZONE)
+    .replace("{{", "{")
+    .replace("}}", "}")
+)
+
+# (minuto, prompt): el texto solo cambia cuando cambia el minuto
+_prompt_cache: tuple = (None, None)
+
+
+def _system_prompt() -> str:
+    """SYSTEM_PROMPT con la fecha y hora actuales (cacheado por minuto)."""
+    global _prompt_cache
+    now = datetime.now(TZ)
+    key = now.strftime("%Y-%m-%d %H:%M")
+    if _prompt_cache[0] != key:
+        prompt = _PROMPT_WITH_TZ.replace(
+            "{current_datetime}", now.strftime("%A %d de %B de %Y, %H:%M")
+        )
+        _prompt_cache = (key, prompt)
+    return _prompt_cache[1]
+
+
+# Bloque markdown ```json ... ``` que a veces envuelve la respuesta
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*\n(.*?)\n?```\s*$", re.DOTALL)
+
+
+def _decode(raw: str) -> dict:
+    """Convierte la respuesta de Gemini en dict (tolera bloques markdown)."""
+    fenced = _FENCE_RE.match(raw)
+    return json.loads(fenced.group(1) if fenced else raw)
+
+
+# Cache de resultados para mensajes repetidos tal cual ("¿qué tengo hoy?").
+# La clave incluye la fecha: "hoy"/"mañana" resuelven igual durante el día.
+# Solo "listar": su respuesta es un encabezado y los eventos se leen aparte.
+# "consultar" y "otro" traen texto libre de Gemini que puede depender de la
+# hora del prompt ("¿qué hora es?"), y crear/eliminar/completar siempre van
+# a Gemini.
+RESULT_CACHE_SIZE = 256
+_CACHEABLE_INTENTS = frozenset({"listar"})
+_result_cache: OrderedDict = OrderedDict()
+
+
+def _cache_key(message: str) -> tuple[str, str]:
+    """(fecha de hoy, texto normalizado): mayúsculas y espacios no cuentan."""
+    return datetime.now(TZ).date().isoformat(), " ".join(message.casefold().split())
+
+
+def _cache_lookup(message: str):
+    """Devuelve una copia del resultado cacheado, o None."""
+    key = _cache_key(message)
+    result = _result_cache.get(key)
+    if result is None:
+        return None
+    _result_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+
+def _cache_store(message: str, result: dict):
+    """Guarda el resultado si es de lectura, descartando el más antiguo."""
+    if result.get("intencion") not in _CACHEABLE_INTENTS:
+        return
+    _result_cache[_cache_key(message)] = copy.deepcopy(result)
+    while len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
+_PARSE_ERROR = {
+    "intencion": "otro",
+    "datos": {},
+    "respuesta": "No pude entender bien tu mensaje. ¿Puedes reformularlo?",
+}
+_NLP_ERROR = {
+    "intencion": "otro",
+    "datos": {},
+    "respuesta": "Hubo un error procesando tu mensaje. Intenta de nuevo.",
+}
+_VOICE_ERROR = {
+    "intencion": "otro",
+    "datos": {},
+    "respuesta": "Lo siento, no pude procesar tu mensaje de voz correctamente.",
+}
+
+
+async def parse_user_message_async(message: str) -> dict:
     """Procesa un mensaje del usuario con Gemini y devuelve intención + datos.
 
+    Usa el cliente async: no ocupa un hilo mientras espera la respuesta y el
+    event loop sigue atendiendo otros updates.
+
     Returns:
         dict con claves: intencion, datos, respuesta
     """
-    now = datetime.now(TZ)
-    current_dt = now.strftime("%A %d de %B de %Y, %H:%M")
-
-    prompt = SYSTEM_PROMPT.format(
-        current_datetime=current_dt,
-        timezone=config.TIMEZONE,
-    )
+    cached = _cache_lookup(message)
+    if cached is not None:
+        logger.info(f"NLP resultado (cache): {cached}")
+        return cached
 
+    raw = ""
     try:
-        response = _get_client().models.generate_content(
+        response = await _get_client().aio.models.generate_content(
             model=MODEL,
             contents=message,
-            config=genai.types.GenerateContentConfig(
-                system_instruction=prompt,
+            config=_content_config(
+                system_instruction=_system_prompt(),
                 temperature=0.1,
                 response_mime_type="application/json",
             ),
         )
-
-        raw = response.text.strip()
-        # Limpiar posibles bloques markdown
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[1]
-            if raw.endswith("```"):
-                raw = raw[:-3]
-            raw = raw.strip()
-
-        result = json.loads(raw)
+        raw = response.text
+        result = _decode(raw)
         logger.info(f"NLP resultado: {result}")
+        _cache_store(message, result)
         return result
 
     except json.JSONDecodeError as e:
         logger.error(f"Error parseando respuesta de Gemini: {e}\nRaw: {raw}")
-        return {
-            "intencion": "otro",
-            "datos": {},
-            "respuesta": "No pude entender bien tu mensaje. ¿Puedes reformularlo?",
-        }
+        return dict(_PARSE_ERROR)
     except Exception as e:
         logger.error(f"Error en NLP: {e}")
-        return {
-            "intencion": "otro",
-            "datos": {},
-            "respuesta": "Hubo un error procesando tu mensaje. Intenta de nuevo.",
-        }
+        return dict(_NLP_ERROR)
+
 
+async def parse_voice_message_async(audio_data: bytes, mime_type: str = "audio/ogg") -> dict:
+    """Procesa un audio con Gemini y devuelve intención + datos.
 
-def parse_voice_message(audio_file_path: str) -> dict:
-    """Procesa un archivo de audio con Gemini y devuelve intención + datos.
+    Las notas de voz normales van inline en la petición; las que superan
+    INLINE_AUDIO_LIMIT se suben con la Files API (inline no entrarían en el
+    límite de 20 MB una vez codificadas en base64).
 
     Args:
-        audio_file_path: Ruta local al archivo de audio (ej: .ogg).
+        audio_data: Contenido del audio (ej: .ogg de una nota de voz).
+        mime_type: Tipo MIME del audio.
 
     Returns:
         dict con claves: intencion, datos, respuesta
     """
-    now = datetime.now(TZ)
-    current_dt = now.strftime("%A %d de %B de %Y, %H:%M")
-
-    prompt = SYSTEM_PROMPT.format(
-        current_datetime=current_dt,
-        timezone=config.TIMEZONE,
-    )
+    prompt = _system_prompt()
+    client = _get_client()
+    uploaded = None
 
     try:
-        # Leer el archivo de audio
-        with open(audio_file_path, "rb") as f:
-            audio_data = f.read()
-
-        response = _get_client().models.generate_content(
+        if len(audio_data) > INLINE_AUDIO_LIMIT:
+            uploaded = await client.aio.files.upload(
+                file=io.BytesIO(audio_data), config={"mime_type": mime_type}
+            )
+            audio = uploaded
+        else:
+            audio = {"inline_data": {"mime_type": mime_type, "data": audio_data}}
+
+        response = await client.aio.models.generate_content(
             model=MODEL,
-            contents=[
-                {"inline_data": {"mime_type": "audio/ogg", "data": audio_data}},
-                prompt,
-            ],
-            config=genai.types.GenerateContentConfig(
+            contents=[audio, prompt],
+            config=_content_config(
                 temperature=0.1,
                 response_mime_type="application/json",
             ),
         )
 
-        raw = response.text.strip()
-        # Limpiar posibles bloques markdown
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[1]
-            if raw.endswith("```"):
-                raw = raw[:-3]
-            raw = raw.strip()
-
-        result = json.loads(raw)
+        result = _decode(response.text)
         logger.info(f"NLP Audio resultado: {result}")
         return result
 
     except Exception as e:
         logger.error(f"Error procesando audio con Gemini: {e}")
-        return {
-            "intencion": "otro",
-            "datos": {},
-            "respuesta": "Lo siento, no pude procesar tu mensaje de voz correctamente.",
-        }
+        return dict(_VOICE_ERROR)
+    finally:
+        if uploaded is not None:
+            try:
+                await client.aio.files.delete(name=uploaded.name)
+            except Exception as e:
+                logger.warning(f"No se pudo borrar el audio subido a Gemini: {e}")
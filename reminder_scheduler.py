@@ -5,19 +5,34 @@
 - Renueva tareas no completadas al día siguiente
 """
 
+import asyncio
 import logging
-from datetime import datetime, timedelta, time
+from datetime import date, datetime, timedelta, time
 
-import pytz
+from apscheduler.triggers.combining import OrTrigger
+from apscheduler.triggers.cron import CronTrigger
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import MessageLimit
 from telegram.ext import ContextTypes
 
 import config
-from calendar_service import CalendarService, format_event
+from calendar_service import (
+    TZ,
+    format_event,
+    get_shared_calendar_service,
+    is_completed,
+    parse_datetime,
+)
+from supplement_service import get_supplement_service
 
 logger = logging.getLogger(__name__)
-TZ = pytz.timezone(config.TIMEZONE)
 
-COMPLETED_MARKER = "[COMPLETADA]"
+# Horarios del check de agenda (en la zona horaria configurada)
+AGENDA_CHECK_TRIGGER = OrTrigger([
+    CronTrigger(hour="6-22/2", minute=30, timezone=TZ),
+    CronTrigger(hour=0, minute=0, timezone=TZ),
+])
+
 # Prefijo para marcar tareas originales que ya fueron movidas/renovadas
 RENEWED_MARKER = "[RENOVADA]"
 
@@ -36,7 +51,7 @@ async def check_agenda_and_remind(context: ContextTypes.DEFAULT_TYPE):
         logger.info("Fuera de horario de recordatorios, ignorando.")
         return
 
-    chat_id = config.AUTHORIZED_USER_ID
+    chat_id = config.AUTHORIZED_CHAT_ID
     if not chat_id:
         logger.warning("AUTHORIZED_USER_ID no configurado, no se envían recordatorios.")
         return
@@ -44,16 +59,20 @@ async def check_agenda_and_remind(context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"⏰ Ejecutando check de agenda - {now.strftime('%H:%M')}")
 
     try:
-        cal = CalendarService()
+        cal = get_shared_calendar_service()
 
         # === 1. Recordatorio de eventos de HOY pendientes ===
-        today_events = cal.get_today_events()
+        today_events = await asyncio.to_thread(cal.get_today_events)
         pending_events = []
+        # Se comparan timestamps: no hace falta pasar cada hora a la zona local
+        now_ts = now.timestamp()
+        cutoff_ts = now_ts - 3600
+        # Inicio de cada evento con hora no completado, para la sección 2
+        open_starts = []
 
         for event in today_events:
             # Ignorar eventos ya completados
-            desc = event.get("description", "")
-            if COMPLETED_MARKER in desc:
+            if is_completed(event):
                 continue
 
             start = event.get("start", {})
@@ -62,14 +81,15 @@ async def check_agenda_and_remind(context: ContextTypes.DEFAULT_TYPE):
                 # Evento de día completo (tarea) → siempre mostrar
                 pending_events.append(event)
             elif "dateTime" in start:
-                event_dt = datetime.fromisoformat(start["dateTime"]).astimezone(TZ)
-                if event_dt < now - timedelta(hours=1):
+                event_ts = parse_datetime(start["dateTime"]).timestamp()
+                open_starts.append((event, event_ts))
+                if event_ts < cutoff_ts:
                     # Ya pasó hace más de 1 hora → solo mostrar si parece tarea
                     # (no tiene hora de fin definida o dura todo el día)
                     end = event.get("end", {})
                     if "dateTime" in end:
-                        end_dt = datetime.fromisoformat(end["dateTime"]).astimezone(TZ)
-                        duration = (end_dt - event_dt).total_seconds() / 3600
+                        end_ts = parse_datetime(end["dateTime"]).timestamp()
+                        duration = (end_ts - event_ts) / 3600
                         if duration >= 12:
                             # Parece tarea (dura 12+ horas), seguir mostrando
                             pending_events.append(event)
@@ -79,46 +99,32 @@ async def check_agenda_and_remind(context: ContextTypes.DEFAULT_TYPE):
                 else:
                     pending_events.append(event)
 
+        # Todo el check sale en un solo mensaje: estado + próximos eventos
+        parts = []
         if pending_events:
             lines = [f"⏰ *Recordatorio de agenda* ({now.strftime('%H:%M')})\n"]
             lines.append(f"📋 Tienes *{len(pending_events)}* evento(s) pendiente(s) hoy:\n")
 
             for event in pending_events:
-                lines.append(format_event(event))
+                lines.append(format_event(event, now=now))
 
             lines.append("\n💡 _Escribe \"completé [nombre]\" para marcar como terminada._")
-
-            await context.bot.send_message(
-                chat_id=int(chat_id),
-                text="\n\n".join(lines),
-                parse_mode="Markdown",
-            )
+            parts.append("\n\n".join(lines))
         else:
             # Siempre informar el estado
             if current_hour == 6:
-                await context.bot.send_message(
-                    chat_id=int(chat_id),
-                    text="☀️ *Buenos días!*\n\nNo tienes eventos pendientes para hoy. 🎉",
-                    parse_mode="Markdown",
-                )
+                parts.append("☀️ *Buenos días!*\n\nNo tienes eventos pendientes para hoy. 🎉")
             else:
-                await context.bot.send_message(
-                    chat_id=int(chat_id),
-                    text=f"✅ *Check {now.strftime('%H:%M')}* — No tienes tareas pendientes. ¡Todo al día! 🎉",
-                    parse_mode="Markdown",
+                parts.append(
+                    f"✅ *Check {now.strftime('%H:%M')}* — No tienes tareas pendientes. ¡Todo al día! 🎉"
                 )
 
         # === 2. Próximos eventos (dentro de las próximas 2 horas) ===
         upcoming_2h = []
-        for event in today_events:
-            start = event.get("start", {})
-            if "dateTime" in start:
-                event_dt = datetime.fromisoformat(start["dateTime"]).astimezone(TZ)
-                diff = (event_dt - now).total_seconds() / 60
-                if 0 < diff <= 120:  # Dentro de las próximas 2 horas
-                    desc = event.get("description", "")
-                    if COMPLETED_MARKER not in desc:
-                        upcoming_2h.append((event, int(diff)))
+        for event, event_ts in open_starts:
+            diff = (event_ts - now_ts) / 60
+            if 0 < diff <= 120:  # Dentro de las próximas 2 horas
+                upcoming_2h.append((event, int(diff)))
 
         if upcoming_2h:
             lines = ["🔔 *Próximamente:*\n"]
@@ -131,10 +137,14 @@ async def check_agenda_and_remind(context: ContextTypes.DEFAULT_TYPE):
                     remaining = mins % 60
                     time_str = f"en {hours}h {remaining}min"
                 lines.append(f"• *{summary}* — {time_str}")
+            parts.append("\n".join(lines))
 
+        text = "\n\n".join(parts)
+        # Si juntos no entran en un mensaje, se mandan por separado como antes
+        for chunk in [text] if len(text) <= MessageLimit.MAX_TEXT_LENGTH else parts:
             await context.bot.send_message(
-                chat_id=int(chat_id),
-                text="\n".join(lines),
+                chat_id=chat_id,
+                text=chunk,
                 parse_mode="Markdown",
             )
 
@@ -144,17 +154,17 @@ async def check_agenda_and_remind(context: ContextTypes.DEFAULT_TYPE):
 
 async def send_morning_briefing(context: ContextTypes.DEFAULT_TYPE):
     """Job matutino (7:30 AM): envía el resumen del día."""
-    chat_id = config.AUTHORIZED_USER_ID
+    chat_id = config.AUTHORIZED_CHAT_ID
     if not chat_id: return
 
     logger.info("☀️ Enviando briefing matutino...")
     try:
-        cal = CalendarService()
-        today_events = cal.get_today_events()
+        cal = get_shared_calendar_service()
+        today_events = await asyncio.to_thread(cal.get_today_events)
         
         if not today_events:
             await context.bot.send_message(
-                chat_id=int(chat_id),
+                chat_id=chat_id,
                 text="☀️ *¡Buenos días!*\n\nHoy no tienes eventos agendados. ¡Disfruta tu día libre! 🎉",
                 parse_mode="Markdown",
             )
@@ -165,7 +175,7 @@ async def send_morning_briefing(context: ContextTypes.DEFAULT_TYPE):
             lines.append(format_event(event, show_past_marker=False))
         
         await context.bot.send_message(
-            chat_id=int(chat_id),
+            chat_id=chat_id,
             text="\n\n".join(lines),
             parse_mode="Markdown",
         )
@@ -175,28 +185,27 @@ async def send_morning_briefing(context: ContextTypes.DEFAULT_TYPE):
 
 async def send_smart_reminders(context: ContextTypes.DEFAULT_TYPE):
     """Job frecuente (cada 15 min): envía alertas push 15-30 min antes de eventos."""
-    chat_id = config.AUTHORIZED_USER_ID
+    chat_id = config.AUTHORIZED_CHAT_ID
     if not chat_id: return
 
     now = datetime.now(TZ)
     try:
-        cal = CalendarService()
-        today_events = cal.get_today_events()
+        cal = get_shared_calendar_service()
+        today_events = await asyncio.to_thread(cal.get_today_events)
         
+        now_ts = now.timestamp()
         for event in today_events:
-            desc = event.get("description", "")
-            if COMPLETED_MARKER in desc: continue
+            if is_completed(event): continue
             
             start = event.get("start", {})
             if "dateTime" in start:
-                event_dt = datetime.fromisoformat(start["dateTime"]).astimezone(TZ)
-                diff = (event_dt - now).total_seconds() / 60
+                diff = (parse_datetime(start["dateTime"]).timestamp() - now_ts) / 60
                 
                 # Alerta si faltan entre 14 y 16 minutos (para el trigger de 15 min)
                 if 14 <= diff <= 16:
                     summary = event.get("summary", "Sin título")
                     await context.bot.send_message(
-                        chat_id=int(chat_id),
+                        chat_id=chat_id,
                         text=f"🔔 *¡Atención!* Tu evento *{summary}* comienza en 15 minutos.",
                         parse_mode="Markdown",
                     )
@@ -206,19 +215,19 @@ async def send_smart_reminders(context: ContextTypes.DEFAULT_TYPE):
 
 async def send_weekly_report(context: ContextTypes.DEFAULT_TYPE):
     """Job semanal (Domingo 9 PM): reporte de productividad."""
-    chat_id = config.AUTHORIZED_USER_ID
+    chat_id = config.AUTHORIZED_CHAT_ID
     if not chat_id: return
 
     logger.info("📊 Generando reporte semanal...")
     try:
-        cal = CalendarService()
+        cal = get_shared_calendar_service()
         # Obtener eventos de los últimos 7 días
         now = datetime.now(TZ)
         start_week = now - timedelta(days=7)
-        events = cal.list_events(start_week, now)
+        events = await asyncio.to_thread(cal.list_events, start_week, now)
         
         total = len(events)
-        completed = sum(1 for e in events if COMPLETED_MARKER in e.get("description", ""))
+        completed = sum(1 for e in events if is_completed(e))
         
         if total == 0: return
 
@@ -232,7 +241,7 @@ async def send_weekly_report(context: ContextTypes.DEFAULT_TYPE):
         )
         
         await context.bot.send_message(
-            chat_id=int(chat_id),
+            chat_id=chat_id,
             text=msg,
             parse_mode="Markdown",
         )
@@ -240,29 +249,37 @@ async def send_weekly_report(context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error en reporte semanal: {e}")
 
 
+def _supplement_keyboard(time_key: str) -> InlineKeyboardMarkup:
+    """Botones Hecho / en 30 min de un grupo de suplementos.
+
+    Se usa la hora como identificador en el callback para ahorrar espacio.
+    """
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("✅ Hecho", callback_data=f"supp_t_done|{time_key}"),
+        InlineKeyboardButton("⏳ en 30 min", callback_data=f"supp_t_snooze|{time_key}"),
+    ]])
+
+
 async def check_supplements_and_remind(context: ContextTypes.DEFAULT_TYPE):
     """Job frecuente (cada minuto): verifica si hay suplementos por tomar."""
-    chat_id = config.AUTHORIZED_USER_ID
+    chat_id = config.AUTHORIZED_CHAT_ID
     if not chat_id: 
         logger.warning("Job de suplementos ignorado: AUTHORIZED_USER_ID no configurado.")
         return
 
     now = datetime.now(TZ)
-    current_time = now.strftime("%H:%M")
-    current_date = now.strftime("%Y-%m-%d")
+    current_time = f"{now.hour:02d}:{now.minute:02d}"
+    current_date = now.date().isoformat()
 
     try:
-        from supplement_service import SupplementService
-        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-        
-        service = SupplementService()
+        service = get_supplement_service()
         all_supps = service.get_all()
+        if not all_supps:
+            return
         pending = service.get_pending(current_time, current_date)
 
         if not pending:
-            # Solo loggear si hay suplementos registrados pero ninguno pendiente
-            if all_supps:
-                logger.info(f"Check suplementos: {len(all_supps)} registrados, 0 pendientes a las {current_time}")
+            logger.info(f"Check suplementos: {len(all_supps)} registrados, 0 pendientes a las {current_time}")
             return
 
         logger.info(f"🚀 {len(pending)} suplementos pendientes detectedos a las {current_time}")
@@ -270,37 +287,34 @@ async def check_supplements_and_remind(context: ContextTypes.DEFAULT_TYPE):
         # Agrupar por hora de toma para evitar errores de longitud en callback_data
         by_time = {}
         for s in pending:
-            t = s["time"]
-            if t not in by_time: by_time[t] = []
-            by_time[t].append(s)
+            by_time.setdefault(s["time"], []).append(s)
 
-        for time_key, supps in by_time.items():
-            names = [s["name"] for s in supps]
-            names_str = ", ".join(names)
-            
-            logger.info(f"Enviando alerta para grupo de las {time_key}: {names_str}")
+        # Los reintentos de todos los grupos avisados se guardan juntos al final
+        # (también si falla un envío, para no repetir los que sí salieron)
+        sent = []
+        try:
+            for time_key, supps in by_time.items():
+                names = [s["name"] for s in supps]
+                names_str = ", ".join(names)
 
-            # Usamos la hora como identificador en el callback para ahorrar espacio
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Hecho", callback_data=f"supp_t_done|{time_key}"),
-                    InlineKeyboardButton("⏳ en 30 min", callback_data=f"supp_t_snooze|{time_key}"),
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                logger.info(f"Enviando alerta para grupo de las {time_key}: {names_str}")
 
-            await context.bot.send_message(
-                chat_id=int(chat_id),
-                text=f"💊 *¡Hora de tu suplementación!* (Programada: {time_key})\n\n"
-                     f"Debes tomar:\n• *{names_str}* \n\n"
-                     f"¿Ya lo hiciste?",
-                parse_mode="Markdown",
-                reply_markup=reply_markup
-            )
-            
-            # Marcamos el reintento para este grupo para que no se repita en el próximo minuto
-            service.set_next_reminder_by_time(time_key, (now + timedelta(minutes=30)).isoformat())
-            logger.info(f"Alerta enviada y reintento programado para las {time_key}")
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=f"💊 *¡Hora de tu suplementación!* (Programada: {time_key})\n\n"
+                         f"Debes tomar:\n• *{names_str}* \n\n"
+                         f"¿Ya lo hiciste?",
+                    parse_mode="Markdown",
+                    reply_markup=_supplement_keyboard(time_key),
+                )
+
+                sent.append(time_key)
+                logger.info(f"Alerta enviada para las {time_key}")
+        finally:
+            # Marcamos el reintento para que no se repita en el próximo minuto
+            if sent:
+                service.set_next_reminder_by_times(sent, (now + timedelta(minutes=30)).isoformat())
+                logger.info(f"Reintento programado para las {', '.join(sent)}")
 
     except Exception as e:
         logger.error(f"Error CRÍTICO en check de suplementos: {e}", exc_info=True)
@@ -312,41 +326,56 @@ async def renew_uncompleted_tasks(context: ContextTypes.DEFAULT_TYPE, target_dat
     """Job nocturno: renueva tareas no completadas para el día siguiente.
     
     Args:
-        target_date: Fecha de la cual buscar pendientes (default: hoy).
+        target_date: Fecha de la cual buscar pendientes (default: la de
+            `context.job.data`, o si no hoy).
     """
-    chat_id = config.AUTHORIZED_USER_ID
+    chat_id = config.AUTHORIZED_CHAT_ID
     if not chat_id:
         return
 
     now = datetime.now(TZ)
+    if not target_date and context.job:
+        # Los jobs de catch-up pasan la fecha en `data`
+        target_date = context.job.data
     if not target_date:
         target_date = now.date()
     
     logger.info(f"🔄 Ejecutando renovación de tareas no completadas para la fecha {target_date}...")
 
     try:
-        cal = CalendarService()
+        cal = get_shared_calendar_service()
         # Obtener eventos de la fecha objetivo
-        start_of_day = TZ.localize(datetime.combine(target_date, time.min))
-        end_of_day = TZ.localize(datetime.combine(target_date, time.max))
-        today_events = cal.list_events(start_of_day, end_of_day)
-
+        start_of_day = datetime.combine(target_date, time.min, tzinfo=TZ)
+        end_of_day = datetime.combine(target_date, time.max, tzinfo=TZ)
         # Pre-cargar eventos del día siguiente para evitar duplicados
         next_day = target_date + timedelta(days=1)
-        next_day_start = TZ.localize(datetime.combine(next_day, datetime.min.time()))
-        next_day_end = TZ.localize(datetime.combine(next_day, datetime.max.time()))
-        next_day_events = cal.list_events(next_day_start, next_day_end)
+        next_day_start = datetime.combine(next_day, time.min, tzinfo=TZ)
+        next_day_end = datetime.combine(next_day, time.max, tzinfo=TZ)
+        # Son lecturas independientes: se piden a la vez
+        today_events, next_day_events = await asyncio.gather(
+            asyncio.to_thread(cal.list_events, start_of_day, end_of_day),
+            asyncio.to_thread(cal.list_events, next_day_start, next_day_end),
+        )
         
         # Guardamos los resúmenes del día siguiente para verificación rápida
         existing_next_day_summaries = {e.get("summary", "") for e in next_day_events}
         
+        # La copia renovada es igual para todas las tareas: se calcula una vez
+        new_start = next_day_start
+        new_end = new_start + timedelta(days=1)
+        renewed_suffix = f"\n[Renovada - no completada el {target_date.strftime('%d/%m/%Y')}]"
+
         renewed = []
+        # Las escrituras se juntan y se envían en batch al final; las peticiones
+        # se arman en el mismo hilo que las ejecuta (el servicio es por hilo)
+        inserts = []  # (nombre, argumentos de creación, id original, descripción marcada)
+        marks = {}    # {id original: campos} que lo marcan como renovado
 
         for event in today_events:
             desc = event.get("description", "")
 
             # Saltar eventos ya completados o que ya fueron renovados anteriormente
-            if COMPLETED_MARKER in desc or RENEWED_MARKER in desc:
+            if is_completed(event) or RENEWED_MARKER in desc:
                 continue
 
             summary = event.get("summary", "")
@@ -359,11 +388,10 @@ async def renew_uncompleted_tasks(context: ContextTypes.DEFAULT_TYPE, target_dat
             
             # === NUEVO: Evitar duplicados para eventos que ya cubren el día siguiente ===
             if "dateTime" in end:
-                end_dt = datetime.fromisoformat(end["dateTime"]).astimezone(TZ)
-                if end_dt > next_day_start:
+                if parse_datetime(end["dateTime"]) > next_day_start:
                     continue
             elif "date" in end:
-                end_d = datetime.strptime(end["date"], "%Y-%m-%d").date()
+                end_d = date.fromisoformat(end["date"])
                 if end_d > next_day:
                     continue
 
@@ -383,29 +411,40 @@ async def renew_uncompleted_tasks(context: ContextTypes.DEFAULT_TYPE, target_dat
                     # Asegurar que el original tenga la marca de renovado por si falló antes
                     if RENEWED_MARKER not in desc:
                         original_desc = (desc + "\n" + RENEWED_MARKER).strip()
-                        cal.update_event(event["id"], {"description": original_desc})
+                        marks[event["id"]] = {"description": original_desc}
                     continue
 
-                new_start = TZ.localize(
-                    datetime.combine(next_day, datetime.min.time())
-                )
-                new_end = new_start + timedelta(days=1)
-                new_desc = desc + "\n[Renovada - no completada el " + target_date.strftime("%d/%m/%Y") + "]"
-                
-                cal.create_event(
-                    summary=new_summary,
-                    start_dt=new_start,
-                    end_dt=new_end,
-                    description=new_desc.strip(),
-                    all_day=True,
-                )
+                new_event = {
+                    "summary": new_summary,
+                    "start_dt": new_start,
+                    "end_dt": new_end,
+                    "description": (desc + renewed_suffix).strip(),
+                    "all_day": True,
+                }
                 
                 # Marcar el evento original como ya renovado para evitar duplicados en reinicios
                 original_desc = (desc + "\n" + RENEWED_MARKER).strip()
-                cal.update_event(event["id"], {"description": original_desc})
-                
+                inserts.append((summary, new_event, event["id"], original_desc))
+
+        # 1. Crear las copias de mañana en un solo batch
+        if inserts:
+            results = await asyncio.to_thread(
+                cal.create_events, [new_event for _, new_event, _, _ in inserts]
+            )
+            for (summary, _, event_id, original_desc), result in zip(inserts, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error renovando '{summary}': {result}")
+                    continue
+                # Solo se marca el original si la copia se creó bien
+                marks[event_id] = {"description": original_desc}
                 renewed.append(summary)
 
+        # 2. Marcar los originales como renovados en otro batch
+        if marks:
+            for result in await asyncio.to_thread(cal.patch_events, marks):
+                if isinstance(result, Exception):
+                    logger.error(f"Error marcando tarea como renovada: {result}")
+
         if renewed:
             lines = ["🔄 *Tareas renovadas para mañana:*\n"]
             for name in renewed:
@@ -413,13 +452,13 @@ async def renew_uncompleted_tasks(context: ContextTypes.DEFAULT_TYPE, target_dat
             lines.append("\n_No fueron completadas hoy, así que las moví a mañana._")
 
             await context.bot.send_message(
-                chat_id=int(chat_id),
+                chat_id=chat_id,
                 text="\n".join(lines),
                 parse_mode="Markdown",
             )
         else:
             await context.bot.send_message(
-                chat_id=int(chat_id),
+                chat_id=chat_id,
                 text="✅ *Todas las tareas de hoy fueron completadas.* ¡Buen trabajo! 🎉",
                 parse_mode="Markdown",
             )
@@ -431,12 +470,18 @@ async def renew_uncompleted_tasks(context: ContextTypes.DEFAULT_TYPE, target_dat
 def setup_reminders(app):
     """Configura los jobs periódicos de recordatorios."""
     job_queue = app.job_queue
+    now = datetime.now(TZ)
 
     # 1. Briefing matutino a las 7:30 AM
     job_queue.run_daily(send_morning_briefing, time=time(7, 30), name="morning_briefing")
 
-    # 2. Smart Reminders (check cada 15 min)
-    job_queue.run_repeating(send_smart_reminders, interval=900, first=60, name="smart_reminders")
+    # 2. Smart Reminders (check cada 15 min), alineado a :00/:15/:30/:45 para
+    # que coincida con los demás jobs (comparten la lectura cacheada de la
+    # agenda) y no se salte eventos que empiezan en un cuarto de hora
+    seconds_to_quarter = 900 - ((now.minute % 15) * 60 + now.second)
+    job_queue.run_repeating(
+        send_smart_reminders, interval=900, first=seconds_to_quarter, name="smart_reminders"
+    )
 
     # 3. Reporte Semanal (Domingos 9 PM)
     # 0 = Lunes, 6 = Domingo
@@ -445,19 +490,13 @@ def setup_reminders(app):
     # 4. Check de Suplementos (cada minuto)
     job_queue.run_repeating(check_supplements_and_remind, interval=60, first=10, name="supplements")
 
-    # 5. Check de agenda cada 2 horas (versión original mejorada)
-    reminder_times = [
-        time(6, 30), time(8, 30), time(10, 30), time(12, 30),
-        time(14, 30), time(16, 30), time(18, 30), time(20, 30),
-        time(22, 30), time(0, 0),
-    ]
-
-    for t in reminder_times:
-        job_queue.run_daily(
-            check_agenda_and_remind,
-            time=t,
-            name=f"reminder_{t.strftime('%H%M')}",
-        )
+    # 5. Check de agenda cada 2 horas: 6:30, 8:30, ..., 22:30 y 00:00, todo
+    # en un solo job (antes eran diez run_daily)
+    job_queue.run_custom(
+        check_agenda_and_remind,
+        job_kwargs={"trigger": AGENDA_CHECK_TRIGGER},
+        name="agenda_check",
+    )
 
     # 5. Renovación de tareas a las 23:59
     job_queue.run_daily(
@@ -467,7 +506,6 @@ def setup_reminders(app):
     )
 
     # === Catchups al inicio ===
-    now = datetime.now(TZ)
     current_minutes = now.hour * 60 + now.minute
 
     # Si arrancamos después de las 7:30 pero antes de las 10:00, enviar briefing si no se envió
@@ -480,8 +518,9 @@ def setup_reminders(app):
     elif current_minutes <= (4 * 60):
         yesterday = now.date() - timedelta(days=1)
         job_queue.run_once(
-            lambda context: renew_uncompleted_tasks(context, target_date=yesterday),
+            renew_uncompleted_tasks,
             when=30,
+            data=yesterday,
             name="renew_tasks_yesterday_catchup"
         )
 
@@ -1,13 +1,12 @@
 import sys
 import os
+from collections import defaultdict
 from datetime import datetime, time, timedelta
-import pytz
 
 # Add parent directory to path so we can import calendar_service
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import config
-from calendar_service import CalendarService
+from calendar_service import CalendarService, TZ
 
 def remove_duplicates():
     print("Starting duplicate removal for today...")
@@ -15,17 +14,16 @@ def remove_duplicates():
     cal = CalendarService()
     
     # Get today's events (Feb 18th)
-    TZ = pytz.timezone(config.TIMEZONE)
     now = datetime.now(TZ)
-    start_of_day = TZ.localize(datetime.combine(now.date(), time.min))
-    end_of_day = TZ.localize(datetime.combine(now.date(), time.max))
+    start_of_day = datetime.combine(now.date(), time.min, tzinfo=TZ)
+    end_of_day = datetime.combine(now.date(), time.max, tzinfo=TZ)
     
     print(f"Scanning for duplicates between {start_of_day} and {end_of_day}...")
     
     events = cal.list_events(start_of_day, end_of_day)
     
     # Group by summary
-    summary_map = {}
+    summary_map = defaultdict(list)
     for event in events:
         summary = event.get("summary", "")
         # Filter only for tasks (all-day events) or specific renewed tasks
@@ -37,12 +35,11 @@ def remove_duplicates():
             # But let's check duplicates for EVERYTHING just in case, logic is same.
             pass
             
-        if summary not in summary_map:
-            summary_map[summary] = []
         summary_map[summary].append(event)
         
     duplicates_found = 0
     deleted_count = 0
+    to_delete = []
     
     for summary, dup_events in summary_map.items():
         if len(dup_events) > 1:
@@ -59,11 +56,14 @@ def remove_duplicates():
             
             for event_to_delete in events_to_delete:
                 print(f"  Deleting duplicate ID: {event_to_delete['id']}")
-                try:
-                    cal.delete_event(event_to_delete['id'])
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"  Error deleting {event_to_delete['id']}: {e}")
+                to_delete.append(event_to_delete['id'])
+
+    # Delete all duplicates in batch requests (up to 50 per HTTP call)
+    for event_id, result in zip(to_delete, cal.delete_events(to_delete)):
+        if isinstance(result, Exception):
+            print(f"  Error deleting {event_id}: {result}")
+        else:
+            deleted_count += 1
                     
     print(f"\nFinished. Found {duplicates_found} duplicated summaries. Deleted {deleted_count} events.")
 
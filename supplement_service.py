@@ -1,19 +1,29 @@
 import json
 import os
 import logging
-import uuid
+import secrets
 from datetime import datetime
-from typing import List, Dict
-import pytz
+from typing import List, Dict, Tuple
+from zoneinfo import ZoneInfo
 import config
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "data", "supplements.json")
-TZ = pytz.timezone(config.TIMEZONE)
+TZ = ZoneInfo(config.TIMEZONE)
+
+
+def _new_id() -> str:
+    """ID corto de 8 caracteres hex (mismo formato que los ya guardados)."""
+    return secrets.token_hex(4)
+
 
 class SupplementService:
     def __init__(self):
+        # Copia en memoria del archivo; se relee solo si cambió su mtime
+        self._data = None
+        self._mtime = None
+        self._by_time = None
         self._ensure_db()
 
     def _ensure_db(self):
@@ -22,29 +32,65 @@ class SupplementService:
             with open(DB_PATH, "w") as f:
                 json.dump([], f)
 
+    def _remember(self, data: List[Dict]):
+        """Guarda `data` como copia vigente del archivo e invalida los índices."""
+        self._data = data
+        self._mtime = os.stat(DB_PATH).st_mtime_ns
+        self._by_time = None
+
     def _load(self) -> List[Dict]:
         try:
+            if self._data is not None and os.stat(DB_PATH).st_mtime_ns == self._mtime:
+                return self._data
             with open(DB_PATH, "r") as f:
                 data = json.load(f)
                 # Migración: asegurar que todos tengan un ID
                 changed = False
                 for s in data:
                     if "id" not in s:
-                        s["id"] = str(uuid.uuid4())[:8]
+                        s["id"] = _new_id()
                         changed = True
                 if changed:
                     self._save(data)
+                else:
+                    self._remember(data)
                 return data
         except Exception as e:
             logger.error(f"Error cargando suplementos: {e}")
+            self._data = None
             return []
 
     def _save(self, data: List[Dict]):
         try:
-            with open(DB_PATH, "w") as f:
-                json.dump(data, f, indent=4)
+            # Se escribe a un temporal y se reemplaza de golpe: si el proceso
+            # muere a mitad de escritura, el archivo anterior queda intacto
+            payload = json.dumps(data, indent=4)
+            tmp_path = DB_PATH + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, DB_PATH)
+            self._remember(data)
         except Exception as e:
             logger.error(f"Error guardando suplementos: {e}")
+            # Lo que hay en memoria ya no coincide con el archivo
+            self._data = None
+
+    def _update(self, data: List[Dict], match, **fields):
+        """Aplica `fields` a los registros que cumplen `match`.
+
+        Solo reescribe el archivo si algún valor cambió de verdad.
+        """
+        changed = False
+        for s in data:
+            if match(s):
+                for key, value in fields.items():
+                    if s.get(key) != value:
+                        s[key] = value
+                        changed = True
+        if changed:
+            self._save(data)
 
     def add_supplement(self, name: str, time_str: str):
         """Añade un nuevo recordatorio de suplemento.
@@ -53,90 +99,133 @@ class SupplementService:
             name: Nombre del suplemento.
             time_str: Hora en formato HH:MM.
         """
+        added, _ = self.add_supplements([name], time_str)
+        return bool(added)
+
+    def add_supplements(self, names: List[str], time_str: str) -> Tuple[List[str], List[str]]:
+        """Añade varios suplementos a la misma hora con una sola lectura/escritura.
+
+        Returns:
+            (añadidos, ya existentes a esa hora)
+        """
         data = self._load()
         # Verificar si ya existe para evitar duplicados exactos
-        for s in data:
-            if s["name"].lower() == name.lower() and s["time"] == time_str:
-                return False
-        
-        data.append({
-            "id": str(uuid.uuid4())[:8],
-            "name": name,
-            "time": time_str,
-            "last_taken_date": None, # 'YYYY-MM-DD'
-            "active": True,
-            "next_reminder": None # Para el sistema de 'nagging' (reintentos)
-        })
-        self._save(data)
-        return True
+        existing = {s["name"].lower() for s in data if s["time"] == time_str}
+        added, already_exist = [], []
+        for name in names:
+            if name.lower() in existing:
+                already_exist.append(name)
+                continue
+            existing.add(name.lower())
+            added.append(name)
+            data.append({
+                "id": _new_id(),
+                "name": name,
+                "time": time_str,
+                "last_taken_date": None, # 'YYYY-MM-DD'
+                "active": True,
+                "next_reminder": None # Para el sistema de 'nagging' (reintentos)
+            })
+        if added:
+            self._save(data)
+        return added, already_exist
 
     def get_all(self) -> List[Dict]:
         return self._load()
 
+    def get_by_time(self) -> Dict[str, List[Dict]]:
+        """Suplementos activos agrupados por hora (HH:MM), en orden de hora.
+
+        El índice se reutiliza hasta la próxima escritura o cambio del archivo.
+        """
+        data = self._load()
+        if self._by_time is not None and self._data is not None:
+            return self._by_time
+        by_time = {}
+        for s in data:
+            if s.get("active", True):
+                by_time.setdefault(s["time"], []).append(s)
+        by_time = dict(sorted(by_time.items()))
+        if self._data is not None:
+            self._by_time = by_time
+        return by_time
+
     def mark_as_taken(self, names: List[str], date_str: str):
         """Marca varios suplementos como tomados para una fecha."""
         data = self._load()
-        names_lower = [n.lower() for n in names]
-        for s in data:
-            if s["name"].lower() in names_lower:
-                s["last_taken_date"] = date_str
-                s["next_reminder"] = None
-        self._save(data)
+        names_lower = {n.lower() for n in names}
+        self._update(data, lambda s: s["name"].lower() in names_lower,
+                     last_taken_date=date_str, next_reminder=None)
 
     def mark_as_taken_by_time(self, time_str: str, date_str: str):
         """Marca todos los suplementos de una hora específica como tomados."""
         data = self._load()
-        for s in data:
-            if s["time"] == time_str:
-                s["last_taken_date"] = date_str
-                s["next_reminder"] = None
-        self._save(data)
+        self._update(data, lambda s: s["time"] == time_str,
+                     last_taken_date=date_str, next_reminder=None)
 
     def set_next_reminder(self, names: List[str], next_dt_iso: str):
         """Programa el próximo reintento para un grupo de suplementos."""
         data = self._load()
-        names_lower = [n.lower() for n in names]
-        for s in data:
-            if s["name"].lower() in names_lower:
-                s["next_reminder"] = next_dt_iso
-        self._save(data)
+        names_lower = {n.lower() for n in names}
+        self._update(data, lambda s: s["name"].lower() in names_lower,
+                     next_reminder=next_dt_iso)
 
     def set_next_reminder_by_time(self, time_str: str, next_dt_iso: str):
         """Programa el próximo reintento para todos los suplementos de una hora."""
+        self.set_next_reminder_by_times([time_str], next_dt_iso)
+
+    def set_next_reminder_by_times(self, times: List[str], next_dt_iso: str):
+        """Igual que `set_next_reminder_by_time` para varias horas, con un solo guardado."""
+        times = set(times)
         data = self._load()
-        for s in data:
-            if s["time"] == time_str:
-                s["next_reminder"] = next_dt_iso
-        self._save(data)
+        self._update(data, lambda s: s["time"] in times, next_reminder=next_dt_iso)
 
     def get_pending(self, current_time: str, current_date: str) -> List[Dict]:
         """Obtiene suplementos que deben tomarse ahora y no han sido tomados."""
         data = self._load()
         pending = []
         now_aware = datetime.now(TZ)
+        broken = False
         
         for s in data:
-            if not s.get("active", True):
+            # Lo habitual: inactivo o ya tomado hoy, se descarta de una vez
+            if not s.get("active", True) or s["last_taken_date"] == current_date:
                 continue
-            
-            # Caso 1: Hora exacta o pasada hoy, y no tomado hoy
-            # Robusto: si current_time >= s["time"] y no tiene next_reminder y no ha sido tomado
-            if s["last_taken_date"] != current_date:
-                # Si no hay reintento programado, ver si ya pasó su hora hoy
-                if not s.get("next_reminder"):
-                    if current_time >= s["time"]:
-                        pending.append(s)
-                else:
-                    # Si HAY reintento, ver si ya venció
-                    try:
-                        next_rem = datetime.fromisoformat(s["next_reminder"])
-                        if next_rem.tzinfo is None:
-                            next_rem = TZ.localize(next_rem)
-                            
-                        if now_aware >= next_rem:
-                            pending.append(s)
-                    except Exception as e:
-                        logger.error(f"Error parsing next_reminder for {s.get('name')}: {e}")
-            
+
+            next_reminder = s.get("next_reminder")
+            # Sin reintento programado: pendiente si ya pasó su hora hoy
+            if not next_reminder:
+                if current_time >= s["time"]:
+                    pending.append(s)
+                continue
+
+            # Con reintento: pendiente si ya venció
+            try:
+                next_rem = datetime.fromisoformat(next_reminder)
+                if next_rem.tzinfo is None:
+                    next_rem = next_rem.replace(tzinfo=TZ)
+
+                if now_aware >= next_rem:
+                    pending.append(s)
+            except (TypeError, ValueError) as e:
+                # Se descarta el reintento inválido para no volver a
+                # fallar cada minuto; queda como si no tuviera
+                logger.warning(f"next_reminder inválido para {s.get('name')}: {e}")
+                s["next_reminder"] = None
+                broken = True
+
+        if broken:
+            self._save(data)
         return pending
 
+
+# Instancia compartida (se inicializa al primer uso)
+_shared_supplements = None
+
+
+def get_supplement_service() -> SupplementService:
+    """Devuelve la instancia compartida de SupplementService (lazy init)."""
+    global _shared_supplements
+    if _shared_supplements is None:
+        _shared_supplements = SupplementService()
+    return _shared_supplements